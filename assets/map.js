@@ -0,0 +1,193 @@
+// Island map runtime shared by the module pages; see assets/maps.yml.
+//
+// tools/build_map_pages.py minifies this expression and calls it with the
+// page's config: {islands: {island: challenge id}, points: {challenge id:
+// CTF points}, solves: {challenge id: CTF solves}}. Keep to plain ES5-style
+// statements with explicit semicolons and no regex literals so the minifier
+// stays trivial.
+(function (config) {
+  "use strict";
+  var ZOOM = 3;
+  var container = document.getElementById("island_container");
+  var baseImage = document.getElementById("baseImage");
+  var panel = document.getElementById("current-challenge");
+  var input = document.getElementById("challenge-input");
+  var islandOf = {};
+  // challenge id -> its .accordion-item, filled by one pass over the list.
+  var items = {};
+  var centroids = {};
+  var zoomedIsland = null;
+
+  Object.keys(config.islands).forEach(function (island) {
+    islandOf[config.islands[island]] = island;
+  });
+
+  function byId(id) {
+    return document.getElementById(id);
+  }
+
+  function field(item, selector, property) {
+    var node = item.querySelector(selector);
+    return node ? node[property] : "";
+  }
+
+  function setField(selector, property, value) {
+    var node = panel.querySelector(selector);
+    if (node) {
+      node[property] = value;
+    }
+  }
+
+  // Layers beyond the unsolved one are only fetched once needed.
+  function loadLevel(level) {
+    container.classList.add("load-" + level);
+  }
+
+  function markSolved(island) {
+    var light = byId(island + "-light");
+    var color = byId(island + "-color");
+    if (light) {
+      light.classList.remove(island + "-current");
+      light.classList.add("hide");
+    }
+    if (color) {
+      color.classList.add(island + "-current");
+      color.classList.remove("hide");
+    }
+    loadLevel("color");
+  }
+
+  function toggleHover(island) {
+    var medium = byId(island + "-medium");
+    var current = container.getElementsByClassName(island + "-current");
+    loadLevel("medium");
+    if (medium) {
+      medium.classList.toggle("hide");
+    }
+    for (var i = 0; i < current.length; i++) {
+      current[i].classList.toggle("hide");
+    }
+  }
+
+  function indexChallenges() {
+    var nodes = document.querySelectorAll(".accordion-item");
+    for (var i = 0; i < nodes.length; i++) {
+      var item = nodes[i];
+      var id = item.id === "challenges" ? "" : field(item, "#challenge", "value");
+      if (!id) {
+        continue;
+      }
+      items[id] = item;
+      if (islandOf[id] && !item.querySelector(".challenge-unsolved")) {
+        markSolved(islandOf[id]);
+      }
+    }
+  }
+
+  // Everything but the id and solved state is read only when an island opens.
+  function showChallenge(island) {
+    var id = config.islands[island];
+    var item = items[id];
+    if (!item) {
+      return false;
+    }
+    var solves = config.solves[id];
+    setField(".title", "textContent", field(item, ".challenge-name", "textContent"));
+    setField(".points", "textContent", "Worth " + (config.points[id] || 500) + " points in CTF");
+    setField(".num-solves", "textContent", solves === undefined ? "" : solves + " solves during the CTF");
+    setField(".pwn-solves", "textContent", field(item, ".total-solves", "textContent"));
+    setField(".challenge-description", "innerHTML", field(item, ".accordion-item-body .embed-responsive", "innerHTML"));
+    setField("#module", "value", field(item, "#module", "value"));
+    setField("#challenge", "value", id);
+    setField("#challenge-id", "value", field(item, "#challenge-id", "value"));
+    return true;
+  }
+
+  function centroid(polygon) {
+    var points = polygon.points;
+    var x = 0;
+    var y = 0;
+    for (var i = 0; i < points.numberOfItems; i++) {
+      x += points.getItem(i).x;
+      y += points.getItem(i).y;
+    }
+    return {x: x / points.numberOfItems, y: y / points.numberOfItems};
+  }
+
+  function zoomTo(island, polygon) {
+    var center = centroids[island] || (centroids[island] = centroid(polygon));
+    // The canvas size, whichever srcset candidate was picked.
+    var width = Number(baseImage.getAttribute("width")) || baseImage.naturalWidth;
+    var height = Number(baseImage.getAttribute("height")) || baseImage.naturalHeight;
+    var x = center.x * baseImage.clientWidth / width * ZOOM - window.innerWidth / 2;
+    var y = center.y * baseImage.clientHeight / height * ZOOM - window.innerHeight / 2;
+    container.style.transform = "translate(" + (-x) + "px, " + (-y) + "px) scale(" + ZOOM + ")";
+    // Swap in the full-resolution ocean and sprites for the zoomed view.
+    var sized = container.querySelectorAll("picture source, picture img");
+    for (var i = 0; i < sized.length; i++) {
+      sized[i].sizes = ZOOM * 100 + "vw";
+    }
+    container.classList.add("hires");
+  }
+
+  function zoomOut() {
+    if (zoomedIsland !== null) {
+      container.style.transform = "none";
+      panel.classList.add("hide");
+      zoomedIsland = null;
+    }
+  }
+
+  Object.keys(config.islands).forEach(function (island) {
+    var polygon = container.querySelector(".overlay-svg ." + island);
+    if (!polygon) {
+      return;
+    }
+    polygon.addEventListener("mouseenter", function () {
+      toggleHover(island);
+    });
+    polygon.addEventListener("mouseleave", function () {
+      toggleHover(island);
+    });
+    polygon.addEventListener("click", function () {
+      if (zoomedIsland !== null) {
+        zoomOut();
+      } else if (showChallenge(island)) {
+        zoomTo(island, polygon);
+        panel.classList.remove("hide");
+        zoomedIsland = island;
+      }
+    });
+  });
+
+  panel.querySelector(".close").addEventListener("click", zoomOut);
+  document.addEventListener("keydown", function (event) {
+    if (event.key === "Escape") {
+      zoomOut();
+    }
+  });
+
+  // The flag form marks the input "correct" once a submission is accepted.
+  new MutationObserver(function () {
+    if (zoomedIsland !== null && input.classList.contains("correct")) {
+      markSolved(zoomedIsland);
+    }
+  }).observe(input, {attributes: true, attributeFilter: ["class"]});
+
+  function prefetchHover() {
+    (window.requestIdleCallback || setTimeout)(function () {
+      loadLevel("medium");
+    });
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", indexChallenges);
+  } else {
+    indexChallenges();
+  }
+  if (document.readyState === "complete") {
+    prefetchHover();
+  } else {
+    window.addEventListener("load", prefetchHover);
+  }
+})
@@ -2,18 +2,38 @@
 
 from __future__ import annotations
 
+import bisect
 import datetime as dt
+import json
+import math
 import os
+import signal
+import socket
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 from urllib.parse import urlparse
 
 import jwt
 import requests
 from flask import (
     Flask,
+    Response,
     abort,
     current_app,
     g,
@@ -22,9 +42,15 @@ from flask import (
     redirect,
     render_template,
     request,
+    stream_with_context,
     url_for,
 )
 
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
 DB_PATH = "/challenge/conference.db"
 MASTER_SECRET_PATH = Path("/challenge/jwt_master.secret")
 JWT_COOKIE_NAME = "session_token"
@@ -32,6 +58,13 @@ JWT_ALGORITHM = "HS256"
 JWT_LIFETIME = dt.timedelta(hours=2)
 FLAG_VALUE = open("/flag", "r").read().strip()
 ROLE_ORDER = {"author": 1, "reviewer": 2, "admin": 3}
+RATING_RANGE = (1, 5)
+DECISION_STATUSES = {"accepted", "rejected"}
+BULK_DECISION_CHUNK = 500
+STREAM_BATCH_ROWS = 100
+DB_CACHED_STATEMENTS = 256
+PROFILE_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+LOCAL_ADDRS = {"127.0.0.1", "::1"}
 
 
 def _load_master_secret() -> str:
@@ -53,11 +86,317 @@ def _load_master_secret() -> str:
     return secret
 
 
+class TokenBucketLimiter:
+    """Per-key token buckets held in an LRU-bounded, per-process store."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Take one token for ``key``; return 0 on success, else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                tokens, last = bucket
+                bucket[0] = min(self.burst, tokens + (now - last) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key onto a single execution."""
+
+    class _Call:
+        def __init__(self) -> None:
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "SingleFlight._Call"] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class RouteMetrics:
+    """Thread-safe per-route latency histograms, one per request phase."""
+
+    def __init__(self, buckets_ms: Sequence[float] = PROFILE_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def observe(self, route: str, phase: str, elapsed_ms: float) -> None:
+        slot = bisect.bisect_left(self.buckets_ms, elapsed_ms)
+        with self._lock:
+            phases = self._routes.setdefault(route, {})
+            hist = phases.get(phase)
+            if hist is None:
+                hist = phases[phase] = {
+                    "counts": [0] * (len(self.buckets_ms) + 1),
+                    "count": 0,
+                    "sum_ms": 0.0,
+                }
+            hist["counts"][slot] += 1
+            hist["count"] += 1
+            hist["sum_ms"] += elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {
+                route: {
+                    phase: {
+                        "counts": list(hist["counts"]),
+                        "count": hist["count"],
+                        "sum_ms": round(hist["sum_ms"], 3),
+                    }
+                    for phase, hist in phases.items()
+                }
+                for route, phases in self._routes.items()
+            }
+        return {"buckets_ms": list(self.buckets_ms) + ["+Inf"], "routes": routes}
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """SQLite connection that times statements and logs slow ones with their plan."""
+
+    slow_query_ms = 50.0
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        self._observe(sql, parameters, start)
+        return cursor
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        # Materialized so the first row can still be explained afterwards.
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        self._observe(sql, seq_of_parameters[0] if seq_of_parameters else (), start)
+        return cursor
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        cursor = super().executescript(sql_script)
+        self._observe(sql_script, None, start)
+        return cursor
+
+    def _observe(self, sql: str, parameters: Any, start: float) -> None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if "sql_ms" in g:
+            g.sql_ms += elapsed_ms
+        if elapsed_ms >= self.slow_query_ms:
+            self._log_slow_query(sql, parameters, elapsed_ms)
+
+    def _log_slow_query(
+        self, sql: str, parameters: Optional[Any], elapsed_ms: float
+    ) -> None:
+        if parameters is None:
+            # A script may hold several statements; there is no single plan.
+            plan = ["<script>"]
+        else:
+            try:
+                plan = [
+                    row[-1]
+                    for row in super().execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+                ]
+            except sqlite3.Error as exc:
+                plan = [f"<unavailable: {exc}>"]
+        current_app.logger.warning(
+            "slow query (%.1f ms): %s | plan: %s",
+            elapsed_ms,
+            " ".join(sql.split()),
+            "; ".join(plan),
+        )
+
+
+def _count_statement(_statement: str) -> None:
+    if "sql_statements" in g:
+        g.sql_statements += 1
+
+
+# Static SQL used by the handlers, by name. Keeping the text fixed means every
+# pooled connection's statement cache holds one prepared copy of each.
+QUERIES: Dict[str, str] = {
+    "user_by_id": "SELECT id, username, role FROM users WHERE id = ?",
+    "user_by_username": "SELECT id, username, role FROM users WHERE username = ?",
+    "credentials_by_username": (
+        "SELECT id, username, password, role FROM users WHERE username = ?"
+    ),
+    "papers_by_author": (
+        "SELECT id, title, status, created_at FROM papers "
+        "WHERE author_id = ? ORDER BY created_at DESC"
+    ),
+    "paper_by_id": "SELECT id, title, abstract, status FROM papers WHERE id = ?",
+    "paper_exists": "SELECT 1 FROM papers WHERE id = ?",
+    "invite_by_code": (
+        "SELECT code, role, used, expires_at FROM review_invites WHERE code = ?"
+    ),
+    "review_by_id": "SELECT id, paper_id, comments, rating FROM reviews WHERE id = ?",
+    "review_by_paper_and_reviewer": (
+        "SELECT id FROM reviews WHERE paper_id = ? AND reviewer_id = ?"
+    ),
+    "reviews_by_paper": """
+        SELECT reviews.id, reviews.reviewer_id, reviews.comments, reviews.rating,
+               users.username AS reviewer
+        FROM reviews
+        JOIN users ON users.id = reviews.reviewer_id
+        WHERE reviews.paper_id = ?
+        ORDER BY reviews.id
+    """,
+    "reviews_by_reviewer": """
+        SELECT reviews.id, reviews.paper_id, papers.title, reviews.comments, reviews.rating
+        FROM reviews
+        JOIN papers ON papers.id = reviews.paper_id
+        WHERE reviews.reviewer_id = ?
+        ORDER BY reviews.id DESC
+    """,
+}
+
+
+def query(
+    conn: sqlite3.Connection, name: str, parameters: Sequence[Any] = ()
+) -> sqlite3.Cursor:
+    """Run the named query from ``QUERIES``."""
+    return conn.execute(QUERIES[name], parameters)
+
+
+def check_query_plans(conn: sqlite3.Connection) -> List[str]:
+    """Prepare every named query and return problems with its plan, if any.
+
+    Each query must compile against the schema, and none may fall back to a
+    full table scan or a temporary sort. ``tools/check_query_plans.py`` runs
+    this against the seeded schema and fails on any problem.
+    """
+    problems = []
+    for name, sql in QUERIES.items():
+        parameters = (None,) * sql.count("?")
+        try:
+            plan = [
+                row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+            ]
+        except sqlite3.Error as exc:
+            problems.append(f"{name}: {exc}")
+            continue
+        for step in plan:
+            if step.startswith("SCAN") or "TEMP B-TREE" in step:
+                problems.append(f"{name}: {step}")
+    return problems
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections shared by requests across threads.
+
+    Reusing connections keeps each one's prepared-statement cache warm.
+    Connections are rolled back when returned, and ones opened before a
+    fork are left alone by the child.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int) -> None:
+        self._connect = connect
+        self._size = size
+        self._idle: List[sqlite3.Connection] = []
+        # Inherited from a parent process; kept referenced so they are never
+        # closed (or finalized) from the child.
+        self._inherited: List[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._inherited.extend(self._idle)
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self._size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+
+def _log_query_plans(app: Flask) -> None:
+    # A private read-only connection, closed again before any worker forks.
+    conn = sqlite3.connect(f"file:{app.config['DATABASE']}?mode=ro", uri=True)
+    try:
+        for problem in check_query_plans(conn):
+            app.logger.warning("query plan: %s", problem)
+    finally:
+        conn.close()
+
+
+def _connect_db() -> sqlite3.Connection:
+    config = current_app.config
+    if config["PROFILE"]:
+        conn = sqlite3.connect(
+            config["DATABASE"],
+            factory=ProfiledConnection,
+            check_same_thread=False,
+            cached_statements=config["DB_CACHED_STATEMENTS"],
+        )
+        conn.slow_query_ms = config["SLOW_QUERY_MS"]
+    else:
+        conn = sqlite3.connect(
+            config["DATABASE"],
+            check_same_thread=False,
+            cached_statements=config["DB_CACHED_STATEMENTS"],
+        )
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
 def get_db() -> sqlite3.Connection:
-    """Return a SQLite connection tied to the current request context."""
+    """Return the pooled SQLite connection checked out for the current request."""
     if "db" not in g:
-        conn = sqlite3.connect(current_app.config["DATABASE"])
-        conn.row_factory = sqlite3.Row
+        conn = current_app.extensions["db_pool"].acquire()
+        if current_app.config["PROFILE"]:
+            conn.set_trace_callback(_count_statement)
         g.db = conn
     return g.db
 
@@ -65,7 +404,95 @@ def get_db() -> sqlite3.Connection:
 def close_db(_: Optional[BaseException] = None) -> None:
     conn = g.pop("db", None)
     if conn is not None:
-        conn.close()
+        conn.set_trace_callback(None)
+        current_app.extensions["db_pool"].release(conn)
+
+
+def _detach_db() -> sqlite3.Connection:
+    """Hand the request's connection over to a streamed body, which must release it."""
+    conn = get_db()
+    g.pop("db")
+    # The statement counter reads ``g``, which is gone once the body streams.
+    conn.set_trace_callback(None)
+    return conn
+
+
+def _dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _stream_json_rows(
+    key: str,
+    conn: sqlite3.Connection,
+    cursor: sqlite3.Cursor,
+    transform: Optional[Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Response:
+    """Stream ``{**extra, key: [rows]}`` straight from ``cursor``.
+
+    Rows are fetched and encoded in batches rather than collected into a list
+    of dicts first. ``transform`` may reshape a row or return None to drop it.
+    The body owns ``conn`` (see ``_detach_db``) and returns it to the pool.
+    """
+    pool = current_app.extensions["db_pool"]
+    columns = [column[0] for column in cursor.description]
+    cursor.row_factory = None
+
+    released = False
+
+    def close() -> None:
+        nonlocal released
+        if released:
+            return
+        released = True
+        cursor.close()
+        pool.release(conn)
+
+    def generate() -> Iterator[str]:
+        try:
+            yield (_dumps(extra)[:-1] + "," if extra else "{") + _dumps(key) + ":["
+            first = True
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_ROWS)
+                if not rows:
+                    break
+                parts = []
+                for row in rows:
+                    item: Optional[Dict[str, Any]] = dict(zip(columns, row))
+                    if transform is not None:
+                        item = transform(item)
+                        if item is None:
+                            continue
+                    parts.append(_dumps(item))
+                if parts:
+                    yield ("" if first else ",") + ",".join(parts)
+                    first = False
+            yield "]}"
+        finally:
+            close()
+
+    response = Response(generate(), mimetype="application/json")
+    # A body that is never iterated (client gone, HEAD request) never runs
+    # the generator's ``finally``; closing the response still returns conn.
+    response.call_on_close(close)
+    return response
+
+
+def _parse_rating(value: Any) -> Optional[int]:
+    """Return ``value`` as an int if it is a whole number, else None.
+
+    ``int()`` alone would quietly truncate 4.7 to 4.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
 def _get_request_data() -> Dict[str, Any]:
@@ -86,10 +513,7 @@ def _apply_invite_code(
     conn: sqlite3.Connection, code: str, user_id: int
 ) -> Dict[str, Any]:
     """Attempt to redeem a reviewer invite for the given user without committing."""
-    invite = conn.execute(
-        "SELECT code, role, used, expires_at FROM review_invites WHERE code = ?",
-        (code,),
-    ).fetchone()
+    invite = query(conn, "invite_by_code", (code,)).fetchone()
     if not invite:
         return {"status": 404, "error": "invalid invite"}
     if invite["used"]:
@@ -110,8 +534,78 @@ def _apply_invite_code(
     return {"status": 200, "role": invite["role"]}
 
 
-def _issue_token_response(user_row: sqlite3.Row, message: str) -> Any:
-    """Create a JWT for the given user row and return a JSON response with cookie."""
+def _parse_decision(item: Any) -> Tuple[Optional[int], Optional[str], Optional[str]]:
+    """Return (paper_id, status, error) for one bulk decision entry."""
+    if isinstance(item, dict):
+        paper_id, status = item.get("paper_id"), item.get("status")
+    elif isinstance(item, (list, tuple)) and len(item) == 2:
+        paper_id, status = item
+    else:
+        return None, None, "expected {paper_id, status} or [paper_id, status]"
+    if isinstance(paper_id, bool) or not isinstance(paper_id, int):
+        return None, None, "paper_id must be an integer"
+    if status not in DECISION_STATUSES:
+        allowed = ", ".join(sorted(DECISION_STATUSES))
+        return paper_id, None, f"status must be one of: {allowed}"
+    return paper_id, status, None
+
+
+def _apply_bulk_decisions(
+    conn: sqlite3.Connection, decisions: List[Any]
+) -> Iterator[List[Dict[str, Any]]]:
+    """Apply decisions chunk by chunk without committing, yielding per-item results.
+
+    Each chunk costs one existence lookup and one executemany; the caller owns
+    the surrounding transaction.
+    """
+    for start in range(0, len(decisions), BULK_DECISION_CHUNK):
+        chunk = decisions[start : start + BULK_DECISION_CHUNK]
+        parsed = [_parse_decision(item) for item in chunk]
+        wanted = sorted({paper_id for paper_id, status, _ in parsed if status})
+        existing: Set[int] = set()
+        if wanted:
+            placeholders = ",".join("?" * len(wanted))
+            existing = {
+                row[0]
+                for row in conn.execute(
+                    f"SELECT id FROM papers WHERE id IN ({placeholders})", wanted
+                )
+            }
+        updates = []
+        results = []
+        for index, (paper_id, status, error) in enumerate(parsed, start):
+            if error is None and paper_id not in existing:
+                error = "paper not found"
+            if error:
+                results.append({"index": index, "paper_id": paper_id, "error": error})
+                continue
+            updates.append((status, paper_id))
+            results.append({"index": index, "paper_id": paper_id, "status": status})
+        if updates:
+            conn.executemany("UPDATE papers SET status = ? WHERE id = ?", updates)
+        yield results
+
+
+def _check_auth_rate_limit(username: str) -> Optional[Any]:
+    """Return a 429 response if this client or username is out of auth tokens."""
+    limiter: Optional[TokenBucketLimiter] = current_app.extensions["auth_limiter"]
+    if limiter is None:
+        return None
+    for key in (f"ip:{request.remote_addr}", f"user:{username.lower()}"):
+        retry_after = limiter.acquire(key)
+        if retry_after:
+            response = jsonify({"error": "too many attempts, slow down"})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(math.ceil(retry_after))
+            return response
+    return None
+
+
+def _issue_token_response(user_row: Any, message: str) -> Any:
+    """Create a JWT for the given user row and return a JSON response with cookie.
+
+    ``user_row`` is a ``users`` row or an already-loaded ``g.current_user``.
+    """
     conn = get_db()
     token_payload = {
         "sub": user_row["id"],
@@ -188,6 +682,43 @@ def create_app() -> Flask:
     app.config.setdefault("DATABASE", str(DB_PATH))
     app.config.setdefault("JWT_MASTER_SECRET", _load_master_secret())
     app.config.setdefault("FLAG_VALUE", os.environ.get("FLAG_VALUE", FLAG_VALUE))
+    app.config.setdefault("PROFILE", os.environ.get("PORTAL_PROFILE") == "1")
+    app.config.setdefault(
+        "SLOW_QUERY_MS", float(os.environ.get("PORTAL_SLOW_QUERY_MS", 50))
+    )
+    app.config.setdefault(
+        "AUTH_RATE_PER_SEC", float(os.environ.get("PORTAL_AUTH_RATE_PER_SEC", 2))
+    )
+    app.config.setdefault(
+        "AUTH_RATE_BURST", float(os.environ.get("PORTAL_AUTH_RATE_BURST", 20))
+    )
+    app.config.setdefault("AUTH_RATE_MAX_KEYS", 10000)
+    app.config.setdefault(
+        "DB_POOL_SIZE", int(os.environ.get("PORTAL_DB_POOL_SIZE", 16))
+    )
+    app.config.setdefault("DB_CACHED_STATEMENTS", DB_CACHED_STATEMENTS)
+    app.extensions["db_pool"] = ConnectionPool(_connect_db, app.config["DB_POOL_SIZE"])
+    if Path(app.config["DATABASE"]).exists():
+        _log_query_plans(app)
+    app.extensions["auth_limiter"] = (
+        TokenBucketLimiter(
+            app.config["AUTH_RATE_PER_SEC"],
+            app.config["AUTH_RATE_BURST"],
+            app.config["AUTH_RATE_MAX_KEYS"],
+        )
+        if app.config["AUTH_RATE_PER_SEC"] > 0
+        else None
+    )
+    user_lookups = SingleFlight()
+    metrics = RouteMetrics() if app.config["PROFILE"] else None
+
+    if metrics is not None:
+
+        @app.before_request
+        def start_request_timer() -> None:
+            g.sql_ms = 0.0
+            g.sql_statements = 0
+            g.request_started = time.perf_counter()
 
     @app.before_request
     def load_current_user() -> None:
@@ -198,19 +729,42 @@ def create_app() -> Flask:
         payload = _decode_token(token)
         if not payload:
             return
+
+        def fetch_user() -> Optional[Dict[str, Any]]:
+            user_row = query(get_db(), "user_by_id", (payload.get("sub"),)).fetchone()
+            return dict(user_row) if user_row else None
+
+        # Bursts of identical lookups (e.g. clients polling /api/me) share one query.
         try:
-            user_row = (
-                get_db()
-                .execute(
-                    "SELECT id, username, role FROM users WHERE id = ?",
-                    (payload.get("sub"),),
-                )
-                .fetchone()
-            )
+            user = user_lookups.do(("user", str(payload.get("sub"))), fetch_user)
         except sqlite3.OperationalError:
             return
-        if user_row:
-            g.current_user = dict(user_row)
+        if user:
+            g.current_user = dict(user)
+            g.token_payload = payload
+
+    if metrics is not None:
+
+        @app.before_request
+        def stop_auth_timer() -> None:
+            g.auth_finished = time.perf_counter()
+
+        @app.after_request
+        def record_request_timing(response: Any) -> Any:
+            if "auth_finished" not in g:
+                return response
+            now = time.perf_counter()
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            metrics.observe(route, "auth", (g.auth_finished - g.request_started) * 1000)
+            metrics.observe(route, "handler", (now - g.auth_finished) * 1000)
+            metrics.observe(route, "sql", g.sql_ms)
+            metrics.observe(route, "total", (now - g.request_started) * 1000)
+            response.headers["Server-Timing"] = (
+                f"auth;dur={(g.auth_finished - g.request_started) * 1000:.2f}, "
+                f'sql;dur={g.sql_ms:.2f};desc="{g.sql_statements} statements", '
+                f"total;dur={(now - g.request_started) * 1000:.2f}"
+            )
+            return response
 
     @app.teardown_appcontext
     def teardown_db(exception: Optional[BaseException]) -> None:  # noqa: ARG001
@@ -268,6 +822,9 @@ def create_app() -> Flask:
             return jsonify({"error": "invite code must be ASCII"}), 400
         if len(password) < 6:
             return jsonify({"error": "password must be at least 6 characters"}), 400
+        limited = _check_auth_rate_limit(username)
+        if limited:
+            return limited
         conn = get_db()
         try:
             cur = conn.execute(
@@ -287,10 +844,7 @@ def create_app() -> Flask:
                 ]
 
         conn.commit()
-        user_row = conn.execute(
-            "SELECT id, username, role FROM users WHERE username = ?",
-            (username,),
-        ).fetchone()
+        user_row = query(conn, "user_by_username", (username,)).fetchone()
         return _issue_token_response(user_row, "registered")
 
     @app.post("/api/login")
@@ -300,12 +854,12 @@ def create_app() -> Flask:
         password = data.get("password") or ""
         if not username or not password:
             return jsonify({"error": "username and password required"}), 400
+        limited = _check_auth_rate_limit(username)
+        if limited:
+            return limited
         conn = get_db()
         try:
-            user_row = conn.execute(
-                "SELECT id, username, password, role FROM users WHERE username = ?",
-                (username,),
-            ).fetchone()
+            user_row = query(conn, "credentials_by_username", (username,)).fetchone()
         except sqlite3.OperationalError as exc:
             return jsonify({"error": str(exc)}), 500
         if not user_row or user_row["password"] != password:
@@ -320,6 +874,18 @@ def create_app() -> Flask:
         response.delete_cookie(JWT_COOKIE_NAME)
         return response
 
+    @app.post("/api/refresh")
+    def api_refresh() -> Any:
+        # Sliding expiration: re-sign from the claims load_current_user already
+        # verified, but only once the token is past half its lifetime.
+        user = g.get("current_user")
+        if not user:
+            return jsonify({"error": "authentication required"}), 401
+        expires_at = g.token_payload.get("exp", 0)
+        if expires_at - time.time() > JWT_LIFETIME.total_seconds() / 2:
+            return jsonify({"message": "token still fresh", "expires_at": expires_at})
+        return _issue_token_response(user, "token refreshed")
+
     @app.get("/api/me")
     def api_me() -> Any:
         user = g.get("current_user")
@@ -344,21 +910,15 @@ def create_app() -> Flask:
         )
         conn.commit()
         paper_id = cur.lastrowid
-        paper = conn.execute(
-            "SELECT id, title, abstract, status FROM papers WHERE id = ?",
-            (paper_id,),
-        ).fetchone()
+        paper = query(conn, "paper_by_id", (paper_id,)).fetchone()
         return jsonify({"paper": dict(paper)})
 
     @app.get("/api/papers/mine")
     @require_role("author")
     def api_my_papers() -> Any:
         conn = get_db()
-        rows = conn.execute(
-            "SELECT id, title, status, created_at FROM papers WHERE author_id = ? ORDER BY created_at DESC",
-            (g.current_user["id"],),
-        ).fetchall()
-        return jsonify({"papers": [dict(row) for row in rows]})
+        cursor = query(conn, "papers_by_author", (g.current_user["id"],))
+        return _stream_json_rows("papers", _detach_db(), cursor)
 
     @app.get("/api/search")
     @require_role("author")
@@ -370,6 +930,9 @@ def create_app() -> Flask:
             f"WHERE title LIKE '%{query}%' OR abstract LIKE '%{query}%' "
             "ORDER BY created_at DESC"
         )
+        # Fetched in full, not streamed: a query that fails part-way (the
+        # error messages are part of the challenge) must still come back as
+        # a 500 with the statement rather than a truncated 200.
         try:
             rows = conn.execute(sql).fetchall()
         except sqlite3.Error as exc:
@@ -399,10 +962,7 @@ def create_app() -> Flask:
             conn.rollback()
             return jsonify({"error": result["error"]}), result["status"]
         conn.commit()
-        updated_user = conn.execute(
-            "SELECT id, username, role FROM users WHERE id = ?",
-            (g.current_user["id"],),
-        ).fetchone()
+        updated_user = query(conn, "user_by_id", (g.current_user["id"],)).fetchone()
         return _issue_token_response(updated_user, "role upgraded")
 
     @app.post("/api/reviewer/materials/check")
@@ -447,11 +1007,82 @@ def create_app() -> Flask:
             }
         )
 
+    # --------------------------- Reviews ---------------------------
+
+    @app.post("/api/papers/<int:paper_id>/reviews")
+    @require_role("reviewer")
+    def api_submit_review(paper_id: int) -> Any:
+        data = _get_request_data()
+        comments = data.get("comments")
+        if comments is not None:
+            comments = str(comments).strip()
+        rating = _parse_rating(data.get("rating"))
+        if rating is None:
+            return jsonify({"error": "rating must be an integer"}), 400
+        if not RATING_RANGE[0] <= rating <= RATING_RANGE[1]:
+            return (
+                jsonify({"error": "rating must be between %d and %d" % RATING_RANGE}),
+                400,
+            )
+        conn = get_db()
+        if not query(conn, "paper_exists", (paper_id,)).fetchone():
+            return jsonify({"error": "paper not found"}), 404
+        reviewer_id = g.current_user["id"]
+        existing = query(
+            conn, "review_by_paper_and_reviewer", (paper_id, reviewer_id)
+        ).fetchone()
+        if existing:
+            review_id = existing["id"]
+            # Omitting comments on an update only changes the rating.
+            conn.execute(
+                "UPDATE reviews SET comments = COALESCE(?, comments), rating = ? WHERE id = ?",
+                (comments, rating, review_id),
+            )
+        else:
+            review_id = conn.execute(
+                "INSERT INTO reviews (paper_id, reviewer_id, comments, rating) VALUES (?, ?, ?, ?)",
+                (paper_id, reviewer_id, comments or "", rating),
+            ).lastrowid
+        conn.commit()
+        review = query(conn, "review_by_id", (review_id,)).fetchone()
+        return jsonify({"review": dict(review)}), 200 if existing else 201
+
+    @app.get("/api/papers/<int:paper_id>/reviews")
+    @require_role("reviewer")
+    def api_paper_reviews(paper_id: int) -> Any:
+        conn = get_db()
+        cursor = query(conn, "reviews_by_paper", (paper_id,))
+        user = g.current_user
+        is_admin = ROLE_ORDER.get(user["role"], 0) >= ROLE_ORDER["admin"]
+
+        def to_review(row: Dict[str, Any]) -> Dict[str, Any]:
+            review = {
+                "id": row["id"],
+                "comments": row["comments"],
+                "rating": row["rating"],
+                "mine": row["reviewer_id"] == user["id"],
+            }
+            # Reviewers stay anonymous to each other; only admins see who wrote what.
+            if is_admin:
+                review["reviewer"] = row["reviewer"]
+            return review
+
+        return _stream_json_rows(
+            "reviews", _detach_db(), cursor, to_review, {"paper_id": paper_id}
+        )
+
+    @app.get("/api/reviews/mine")
+    @require_role("reviewer")
+    def api_my_reviews() -> Any:
+        conn = get_db()
+        cursor = query(conn, "reviews_by_reviewer", (g.current_user["id"],))
+        return _stream_json_rows("reviews", _detach_db(), cursor)
+
     # --------------------------- Internal + Admin ---------------------------
 
     @app.route("/internal/config")
     def internal_config() -> Any:
-        if request.remote_addr not in {"127.0.0.1", "::1"}:
+        if request.remote_addr not in LOCAL_ADDRS:
             abort(403)
         conn = get_db()
         try:
@@ -467,19 +1098,31 @@ def create_app() -> Flask:
             }
         )
 
+    @app.route("/internal/metrics")
+    def internal_metrics() -> Any:
+        if request.remote_addr not in LOCAL_ADDRS:
+            abort(403)
+        if metrics is None:
+            abort(404)
+        return jsonify({"pid": os.getpid(), **metrics.snapshot()})
+
     @app.get("/api/admin/papers")
     @require_role("admin")
     def api_admin_papers() -> Any:
         conn = get_db()
-        rows = conn.execute(
+        cursor = conn.execute(
             """
-            SELECT papers.id, papers.title, papers.abstract, papers.status, users.username AS author
+            SELECT papers.id, papers.title, papers.abstract, papers.status, users.username AS author,
+                   COALESCE(review_stats.review_count, 0) AS review_count,
+                   ROUND(CAST(review_stats.rating_sum AS REAL) / NULLIF(review_stats.rating_count, 0), 2)
+                       AS avg_rating
             FROM papers
             JOIN users ON users.id = papers.author_id
+            LEFT JOIN review_stats ON review_stats.paper_id = papers.id
             ORDER BY papers.created_at DESC
             """
-        ).fetchall()
-        return jsonify({"papers": [dict(row) for row in rows]})
+        )
+        return _stream_json_rows("papers", _detach_db(), cursor)
 
     @app.post("/admin/papers/<int:paper_id>/accept")
     @require_role("admin")
@@ -510,11 +1153,130 @@ def create_app() -> Flask:
             return jsonify({"error": "paper not found"}), 404
         return jsonify({"message": f"paper {paper_id} rejected"})
 
+    @app.post("/api/admin/papers/decisions")
+    @require_role("admin")
+    def api_admin_bulk_decisions() -> Any:
+        data = request.get_json(silent=True) or {}
+        decisions = data.get("decisions")
+        if not isinstance(decisions, list) or not decisions:
+            return jsonify({"error": "decisions must be a non-empty list"}), 400
+        flag = current_app.config["FLAG_VALUE"]
+
+        def summarize(counts: Dict[str, int]) -> Dict[str, Any]:
+            summary: Dict[str, Any] = {"total": len(decisions), **counts}
+            if counts["accepted"]:
+                summary["flag"] = flag
+            return summary
+
+        def tally(counts: Dict[str, int], results: List[Dict[str, Any]]) -> None:
+            for result in results:
+                counts[result.get("status", "failed")] += 1
+
+        if request.args.get("stream") not in ("1", "true"):
+            conn = get_db()
+            counts = {"accepted": 0, "rejected": 0, "failed": 0}
+            results: List[Dict[str, Any]] = []
+            try:
+                for chunk_results in _apply_bulk_decisions(conn, decisions):
+                    tally(counts, chunk_results)
+                    results.extend(chunk_results)
+            except sqlite3.Error as exc:
+                conn.rollback()
+                return jsonify({"error": str(exc)}), 500
+            conn.commit()
+            return jsonify({"results": results, **summarize(counts)})
+
+        @stream_with_context
+        def generate() -> Iterator[str]:
+            # One NDJSON line per chunk so large batches report progress as they go.
+            # The connection is opened here because the streamed body outlives
+            # the view's own app context.
+            conn = get_db()
+            counts = {"accepted": 0, "rejected": 0, "failed": 0}
+            done = 0
+            try:
+                for chunk_results in _apply_bulk_decisions(conn, decisions):
+                    tally(counts, chunk_results)
+                    done += len(chunk_results)
+                    progress = {
+                        "done": done,
+                        "total": len(decisions),
+                        "results": chunk_results,
+                    }
+                    yield json.dumps(progress) + "\n"
+            except sqlite3.Error as exc:
+                conn.rollback()
+                yield json.dumps({"error": str(exc)}) + "\n"
+                return
+            conn.commit()
+            yield json.dumps({"summary": summarize(counts)}) + "\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+
     return app
 
 
+def serve_prefork(flask_app: Flask, host: str, port: int, workers: int) -> None:
+    """Serve the app from a pool of forked workers sharing one listening socket.
+
+    The app (and with it the JWT master secret) is fully configured before the
+    first fork, so every worker signs and verifies tokens with the same key even
+    when the secret only exists in memory.
+    """
+    from werkzeug.serving import make_server
+
+    listener = socket.create_server((host, port), backlog=128)
+    listener.set_inheritable(True)
+    children: Set[int] = set()
+    stopping = False
+
+    def spawn_worker() -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            server = make_server(
+                host, port, flask_app, threaded=True, fd=listener.fileno()
+            )
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        return pid
+
+    def stop(_signum: int, _frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children.add(spawn_worker())
+
+    while children:
+        try:
+            pid, _status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            # Keep the pool at full size if a worker dies unexpectedly.
+            children.add(spawn_worker())
+    listener.close()
+
+
 app = create_app()
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
+    port = int(os.environ.get("PORT", 5000))
+    workers = int(os.environ.get("WORKERS", 0))
+    if workers > 0:
+        serve_prefork(app, "0.0.0.0", port, workers)
+    else:
+        app.run(host="0.0.0.0", port=port, debug=True)
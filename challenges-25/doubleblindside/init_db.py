@@ -15,6 +15,7 @@ DB_PATH = "./conference.db"
 MASTER_SECRET_PATH = Path("./jwt_master.secret")
 
 RESET_SQL = """
+DROP TABLE IF EXISTS review_stats;
 DROP TABLE IF EXISTS reviews;
 DROP TABLE IF EXISTS review_invites;
 DROP TABLE IF EXISTS papers;
@@ -42,6 +43,8 @@ CREATE TABLE papers (
     FOREIGN KEY (author_id) REFERENCES users(id)
 );
 
+CREATE INDEX idx_papers_author ON papers(author_id, created_at);
+
 CREATE TABLE reviews (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     paper_id INTEGER NOT NULL,
@@ -52,6 +55,53 @@ CREATE TABLE reviews (
     FOREIGN KEY (reviewer_id) REFERENCES users(id)
 );
 
+CREATE INDEX idx_reviews_paper ON reviews(paper_id);
+CREATE INDEX idx_reviews_reviewer ON reviews(reviewer_id);
+
+-- Per-paper review rollup kept current by the triggers below so listings
+-- never have to aggregate the reviews table.
+CREATE TABLE review_stats (
+    paper_id INTEGER PRIMARY KEY,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (paper_id) REFERENCES papers(id)
+);
+
+CREATE TRIGGER reviews_stats_insert AFTER INSERT ON reviews
+BEGIN
+    INSERT INTO review_stats (paper_id, review_count, rating_count, rating_sum)
+    VALUES (NEW.paper_id, 1, NEW.rating IS NOT NULL, COALESCE(NEW.rating, 0))
+    ON CONFLICT(paper_id) DO UPDATE SET
+        review_count = review_count + 1,
+        rating_count = rating_count + excluded.rating_count,
+        rating_sum = rating_sum + excluded.rating_sum;
+END;
+
+CREATE TRIGGER reviews_stats_delete AFTER DELETE ON reviews
+BEGIN
+    UPDATE review_stats SET
+        review_count = review_count - 1,
+        rating_count = rating_count - (OLD.rating IS NOT NULL),
+        rating_sum = rating_sum - COALESCE(OLD.rating, 0)
+    WHERE paper_id = OLD.paper_id;
+END;
+
+CREATE TRIGGER reviews_stats_update AFTER UPDATE OF paper_id, rating ON reviews
+BEGIN
+    UPDATE review_stats SET
+        review_count = review_count - 1,
+        rating_count = rating_count - (OLD.rating IS NOT NULL),
+        rating_sum = rating_sum - COALESCE(OLD.rating, 0)
+    WHERE paper_id = OLD.paper_id;
+    INSERT INTO review_stats (paper_id, review_count, rating_count, rating_sum)
+    VALUES (NEW.paper_id, 1, NEW.rating IS NOT NULL, COALESCE(NEW.rating, 0))
+    ON CONFLICT(paper_id) DO UPDATE SET
+        review_count = review_count + 1,
+        rating_count = rating_count + excluded.rating_count,
+        rating_sum = rating_sum + excluded.rating_sum;
+END;
+
 CREATE TABLE review_invites (
     code TEXT PRIMARY KEY,
     role TEXT NOT NULL,
@@ -74,6 +74,22 @@
     });
   }
 
+  // Keep the session cookie sliding while a page is open; the server only
+  // re-issues the token once it is past half its lifetime.
+  async function refreshSession() {
+    if (!state.currentUser) {
+      return;
+    }
+    try {
+      await apiFetch("/api/refresh", { method: "POST" });
+    } catch (_err) {
+      // An expired session just falls back to the login page on the next request.
+    }
+  }
+
+  refreshSession();
+  setInterval(refreshSession, 15 * 60 * 1000);
+
   window.Portal = {
     apiFetch,
     bindForm,
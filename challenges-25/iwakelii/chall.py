@@ -1,8 +1,195 @@
 #!/usr/bin/exec-suid -- /usr/bin/python3 -I
-from sage.all import *
-from Crypto.Util.number import getPrime
+from Crypto.Util.number import getPrime, isPrime
+import argparse
+import os
+import queue
+import secrets
 import signal
+import socket
+import struct
 import sys
+import threading
+
+try:
+    from gmpy2 import mpz
+except ImportError:
+    mpz = int
+
+# Pregenerated curve parameters written by gen_params.py: one record per
+# curve, four little-endian uint64s (r, p, Gx, Gy).
+PARAMS_POOL = "/challenge/params.pool"
+POOL_RECORD = struct.Struct("<4Q")
+
+# Points are affine (x, y) tuples of ints; None is the point at infinity.
+INFINITY = None
+
+class Curve:
+    """The supersingular curve y^2 = x^3 + x over GF(p), p = 3 mod 4.
+
+    Scalar multiplication is a Montgomery ladder over Jacobian coordinates,
+    so only the final conversion back to affine needs an inversion.
+    """
+
+    def __init__(self, p):
+        self.p = mpz(p)
+
+    def contains(self, P):
+        if P is INFINITY:
+            return True
+        x, y = P
+        return (y * y - x * x * x - x) % self.p == 0
+
+    def _double(self, P):
+        X, Y, Z = P
+        p = self.p
+        if Z == 0 or Y == 0:
+            return (1, 1, 0)
+        YY = Y * Y % p
+        ZZ = Z * Z % p
+        S = 4 * X * YY % p
+        M = (3 * X * X + ZZ * ZZ) % p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y * Z % p
+        return (X3, Y3, Z3)
+
+    def _add(self, P, Q):
+        X1, Y1, Z1 = P
+        X2, Y2, Z2 = Q
+        p = self.p
+        if Z1 == 0:
+            return Q
+        if Z2 == 0:
+            return P
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        U1 = X1 * Z2Z2 % p
+        U2 = X2 * Z1Z1 % p
+        S1 = Y1 * Z2 * Z2Z2 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        if U1 == U2:
+            if S1 != S2:
+                return (1, 1, 0)
+            return self._double(P)
+        H = (U2 - U1) % p
+        R = (S2 - S1) % p
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * Z2 * H % p
+        return (X3, Y3, Z3)
+
+    def _add_affine(self, P, Q):
+        # Mixed addition: Q is affine (Z = 1), which saves a few multiplies.
+        X1, Y1, Z1 = P
+        x2, y2 = Q
+        p = self.p
+        if Z1 == 0:
+            return (x2, y2, 1)
+        Z1Z1 = Z1 * Z1 % p
+        U2 = x2 * Z1Z1 % p
+        S2 = y2 * Z1 * Z1Z1 % p
+        if X1 == U2:
+            if Y1 != S2:
+                return (1, 1, 0)
+            return self._double(P)
+        H = (U2 - X1) % p
+        R = (S2 - Y1) % p
+        HH = H * H % p
+        HHH = H * HH % p
+        V = X1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - Y1 * HHH) % p
+        Z3 = Z1 * H % p
+        return (X3, Y3, Z3)
+
+    def _to_affine(self, P):
+        X, Y, Z = P
+        if Z == 0:
+            return INFINITY
+        p = self.p
+        zinv = pow(int(Z), -1, int(p))
+        zinv2 = zinv * zinv % p
+        return (int(X * zinv2 % p), int(Y * zinv2 * zinv % p))
+
+    def mul(self, k, P):
+        if P is INFINITY:
+            return INFINITY
+        R0 = (1, 1, 0)
+        R1 = (mpz(P[0]), mpz(P[1]), 1)
+        for bit in bin(k)[2:]:
+            if bit == '1':
+                R0 = self._add(R0, R1)
+                R1 = self._double(R1)
+            else:
+                R1 = self._add(R0, R1)
+                R0 = self._double(R0)
+        return self._to_affine(R0)
+
+    def random_point(self):
+        p = self.p
+        while True:
+            x = mpz(secrets.randbelow(int(p)))
+            rhs = (x * x * x + x) % p
+            if rhs == 0:
+                return (int(x), 0)
+            if pow(rhs, (p - 1) // 2, p) == 1:
+                return (int(x), int(pow(rhs, (p + 1) // 4, p)))
+
+class FixedBaseTable:
+    """Precomputed multiples d * 16^i * G so k*G costs one mixed add per nibble."""
+
+    WINDOW = 4
+
+    def __init__(self, E, G, bits):
+        self.E = E
+        self.rows = []
+        base = (mpz(G[0]), mpz(G[1]), 1)
+        for _ in range(-(-bits // self.WINDOW)):
+            row = [INFINITY, E._to_affine(base)]
+            acc = base
+            for _ in range(2, 1 << self.WINDOW):
+                acc = E._add(acc, base)
+                row.append(E._to_affine(acc))
+            self.rows.append([pt if pt is INFINITY else (mpz(pt[0]), mpz(pt[1]))
+                              for pt in row])
+            for _ in range(self.WINDOW):
+                base = E._double(base)
+
+    def mul(self, k):
+        E = self.E
+        acc = (1, 1, 0)
+        mask = (1 << self.WINDOW) - 1
+        for row in self.rows:
+            if not k:
+                break
+            digit = k & mask
+            if digit:
+                acc = E._add_affine(acc, row[digit])
+            k >>= self.WINDOW
+        return E._to_affine(acc)
+
+def make_round(E, G, r, table=None):
+    """Draw one exchange and return its (A, B, S)."""
+    a = secrets.randbelow(r - 1) + 1
+    b = secrets.randbelow(r - 1) + 1
+    A = table.mul(a) if table else E.mul(a, G)
+    B = table.mul(b) if table else E.mul(b, G)
+    S = E.mul(a, B)
+    assert S == E.mul(b, A)
+    return A, B, S
+
+def precompute_rounds(E, G, r, rounds, out):
+    # Background producer for main(): builds the fixed-base table and queues
+    # every round; an exception is queued too so the consumer sees it.
+    try:
+        table = FixedBaseTable(E, G, r.bit_length())
+        for _ in range(rounds):
+            out.put(make_round(E, G, r, table))
+    except Exception as exc:
+        out.put(exc)
 
 def _timeout(_signum, _frame):
     sys.exit(0)
@@ -11,28 +198,75 @@ def get_point_of_order(E, r, n):
     cofactor = n // r
     while True:
         P = E.random_point()
-        if P == E(0):
+        if P is INFINITY:
             continue
-        G = cofactor * P
-        if G != E(0) and (r * G) == E(0):
+        G = E.mul(cofactor, P)
+        if G is not INFINITY and E.mul(r, G) is INFINITY:
             return G
 
-def main():
-    signal.signal(signal.SIGALRM, _timeout)
-    flag = open('/flag', 'r').read()
-
+def generate_params():
     while True:
         r = getPrime(45)
-        p = ZZ(4*r - 1)
-        if p % 4 == 3 and p.is_prime():
+        p = 4*r - 1
+        if p % 4 == 3 and isPrime(p):
             break
 
-    Fp = GF(p)
-    E = EllipticCurve(GF(p), [1, 0])
-    n = E.order()
-    assert E.is_supersingular()
+    # With p = 3 mod 4, y^2 = x^3 + x is supersingular of order p + 1 = 4r.
+    E = Curve(p)
+    G = get_point_of_order(E, r, p + 1)
+    return r, p, E, G
+
+def check_params(r, p, x, y):
+    """Return (r, p, E, G) if the record describes a valid curve, else None."""
+    # Cheap checks only: y^2 = x^3 + x over GF(p) with p = 4r - 1 = 3 mod 4 is
+    # supersingular with order p + 1 = 4r, so G on the curve with r*G = O and
+    # G != O has order exactly r.
+    if r.bit_length() != 45 or p != 4*r - 1 or not isPrime(r) or not isPrime(p):
+        return None
+    E = Curve(p)
+    G = (x, y)
+    if not E.contains(G) or E.mul(r, G) is not INFINITY:
+        return None
+    return r, p, E, G
+
+def load_pooled_params(path=PARAMS_POOL):
+    """Pick a random pregenerated curve, or None if the pool is missing or bad."""
+    try:
+        with open(path, 'rb') as f:
+            count = os.fstat(f.fileno()).st_size // POOL_RECORD.size
+            if count == 0:
+                return None
+            f.seek(secrets.randbelow(count) * POOL_RECORD.size)
+            record = POOL_RECORD.unpack(f.read(POOL_RECORD.size))
+    except OSError:
+        return None
+    return check_params(*record)
 
-    G = get_point_of_order(E, r, n)
+def load_pool(path=PARAMS_POOL):
+    """Load and verify every curve in the pool (used by the forking server)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return []
+    pool = []
+    for record in POOL_RECORD.iter_unpack(data[:len(data) - len(data) % POOL_RECORD.size]):
+        params = check_params(*record)
+        if params:
+            pool.append(params)
+    return pool
+
+def main(params=None, precompute=True):
+    signal.signal(signal.SIGALRM, _timeout)
+    flag = open('/flag', 'r').read()
+
+    r, p, E, G = params or load_pooled_params() or generate_params()
+
+    rounds = queue.Queue()
+    if precompute:
+        # Work out all six exchanges while the banner is being printed.
+        threading.Thread(target=precompute_rounds, args=(E, G, r, 6, rounds),
+                         daemon=True).start()
 
     print("After meditating on Iwakeli`i, I heard a voice!")
     print("She told me the age of quantum is among us and that I shall ascend as a god to lead the charge.")
@@ -45,16 +279,17 @@ def main():
     print("Your time starts NOW!\n\n")
     signal.alarm(540)
     for _ in range(6):
-        a = ZZ.random_element(1, r)
-        b = ZZ.random_element(1, r)
-        A = a * G
-        B = b * G
-        S = a * B
-        assert S == b * A
+        if precompute:
+            exchange = rounds.get()
+            if isinstance(exchange, Exception):
+                raise exchange
+            A, B, S = exchange
+        else:
+            A, B, S = make_round(E, G, r)
         print(f'A = {(A[0], A[1])}')
         print(f'B = {(B[0], B[1])}')
         guess = int(input("What say you?\n"))
-        if S.xy()[0] != guess:
+        if S[0] != guess:
             print("Go back home PUNY MORTAL! You are not cut out for this realm!")
             sys.exit(0)
         print("AGAIN!\n\n")
@@ -62,5 +297,47 @@ def main():
     print("Have this ancient relic as a reward for your skills!")
     print(flag)
 
+def _run_worker(conn, pool, precompute):
+    # Runs in the forked child: the player's socket becomes stdin/stdout and
+    # the usual single-player flow (alarm included) takes over.
+    try:
+        os.dup2(conn.fileno(), 0)
+        os.dup2(conn.fileno(), 1)
+        conn.close()
+        sys.stdout.reconfigure(line_buffering=True)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        main(secrets.choice(pool) if pool else None, precompute)
+    except (SystemExit, EOFError, ValueError, OSError):
+        pass
+    finally:
+        try:
+            sys.stdout.flush()
+        except OSError:
+            pass
+        os._exit(0)
+
+def serve(host, port, precompute=True):
+    """Keep a warm parent with the verified pool and fork a worker per player."""
+    pool = load_pool()
+    listener = socket.create_server((host, port), backlog=64)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    print(f"[*] Serving on {host}:{port} with {len(pool)} pooled curves", flush=True)
+    while True:
+        conn, _ = listener.accept()
+        if os.fork() == 0:
+            listener.close()
+            _run_worker(conn, pool, precompute)
+        conn.close()
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="listen for players and fork a warm worker per connection")
+    parser.add_argument("--no-precompute", dest="precompute", action="store_false",
+                        help="compute each round interactively instead of in the background")
+    args = parser.parse_args()
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        serve(host or "0.0.0.0", int(port), args.precompute)
+    else:
+        main(precompute=args.precompute)
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Precompute a pool of iwakelii curve parameters so connections skip generation.
+
+Run from the challenge directory (it imports chall.py):
+
+    ./gen_params.py --count 64 --output /challenge/params.pool
+
+With --check-sage every curve is also cross-checked against Sage, which is
+only needed for that check.
+"""
+import argparse
+import os
+import secrets
+
+from chall import PARAMS_POOL, POOL_RECORD, generate_params
+
+def check_with_sage(r, p, E, G, rounds=8):
+    from sage.all import GF, EllipticCurve
+
+    SE = EllipticCurve(GF(p), [1, 0])
+    assert SE.is_supersingular()
+    assert SE.order() == 4 * r
+    SG = SE(G[0], G[1])
+    assert SG != SE(0) and r * SG == SE(0)
+    for _ in range(rounds):
+        k = secrets.randbelow(r - 1) + 1
+        P = k * SG
+        assert E.mul(k, G) == (int(P[0]), int(P[1]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the iwakelii parameter pool.")
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--output", default=PARAMS_POOL)
+    parser.add_argument("--check-sage", action="store_true",
+                        help="cross-check every curve and some multiples with Sage")
+    args = parser.parse_args()
+
+    tmp = args.output + ".tmp"
+    with open(tmp, 'wb') as f:
+        for _ in range(args.count):
+            r, p, E, G = generate_params()
+            if args.check_sage:
+                check_with_sage(r, p, E, G)
+            f.write(POOL_RECORD.pack(r, p, G[0], G[1]))
+    os.replace(tmp, args.output)
+    print(f"[*] Wrote {args.count} curves to {args.output}")
+
+if __name__ == "__main__":
+    main()
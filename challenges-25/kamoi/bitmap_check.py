@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+# solvability check for a generated kamoi challenge.
+#
+# works from what the build leaves behind: the fuzz_bitmap of the flag run,
+# the output.txt that run wrote, afl-clang-lto's AFL_LLVM_DOCUMENT_IDS file
+# (which function owns every edge), the generator's --manifest, and one
+# probe bitmap per candidate character (the binary run on that character
+# repeated). a character is consistent with a checker function when every
+# edge the probe lights up only for that character is also set in the flag
+# bitmap. output.txt then ties each checker to the flag index it was called
+# with, since hash[k] = ret ^ idx for the k-th call in main.
+#
+# this is an offline check, not part of .init: it costs one showmap run per
+# printable character and needs NumPy. build into a scratch directory with
+# the manifest and edge ids, then point the check at it, e.g.
+#
+#   ./genbinary-switch.py --flag-file flag --source /tmp/k/challenge.c \
+#       --input /tmp/k/input.txt --manifest /tmp/k/manifest.json --build \
+#       --output /tmp/k/chall --bitmap /tmp/k/fuzz_bitmap \
+#       --edge-ids /tmp/k/edge_ids.txt
+#   ./bitmap_check.py --binary /tmp/k/chall --bitmap /tmp/k/fuzz_bitmap \
+#       --output-txt /tmp/k/output.txt --edge-ids /tmp/k/edge_ids.txt \
+#       --manifest /tmp/k/manifest.json --expect /tmp/k/input.txt \
+#       --probes /tmp/k/probes.npy
+#
+# --probes keeps the probe bitmaps so a rerun against the same binary skips
+# the showmap runs.
+import os
+import re
+import sys
+import json
+import tempfile
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+AFL_SHOWMAP = "/opt/AFLplusplus/afl-showmap"
+
+EDGE_ID_RE = re.compile(r"Function=(\S+) edgeID=(\d+)")
+
+
+def LoadBitmap(path):
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+# edge id -> index into manifest["functions"], -1 for edges outside
+# the checkers (runtime helpers, main, ...)
+def LoadEdgeOwners(path, functions, map_size):
+    index = {name: i for i, name in enumerate(functions)}
+    owners = np.full(map_size, -1, dtype=np.int32)
+    with open(path, "r") as fp:
+        for line in fp:
+            match = EDGE_ID_RE.search(line)
+            if match:
+                name, edge = match.group(1), int(match.group(2))
+            else:
+                # older AFL++ writes "<function> <edge id>"
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].isdigit():
+                    continue
+                name, edge = parts[0], int(parts[1])
+            if edge < map_size and name in index:
+                owners[edge] = index[name]
+    return owners
+
+
+def LoadOutput(path):
+    with open(path, "r") as fp:
+        return np.frombuffer(bytes.fromhex(fp.read().strip()), dtype=np.uint8)
+
+
+def ProbeChar(binary, showmap, flag_len, char):
+    # the checker writes output.txt into its cwd, so keep probes
+    # away from the real one
+    with tempfile.TemporaryDirectory() as workdir:
+        bitmap = os.path.join(workdir, "bitmap")
+        subprocess.run(
+            [showmap, "-q", "-b", "-o", bitmap, "--", binary],
+            input=bytes([char]) * flag_len,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=workdir,
+        )
+        return np.fromfile(bitmap, dtype=np.uint8)
+
+
+def Probe(binary, showmap, flag_len, chars, jobs=None):
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        maps = pool.map(lambda c: ProbeChar(binary, showmap, flag_len, c), chars)
+        return np.stack(list(maps))
+
+
+# returns consistent[f, c]: probe character chars[c] could have been
+# what checker f saw during the flag run
+def ConsistentChars(bitmap, probes, owners):
+    n_chars = probes.shape[0]
+    n_funcs = int(owners.max()) + 1
+    hit = bitmap != 0
+    lit = probes != 0
+    # edges every probe reaches (entries, the runtime) say nothing
+    specific = lit & ~lit.all(axis=0)
+    specific &= owners >= 0
+
+    c_idx, e_idx = np.nonzero(specific)
+    cell = c_idx * n_funcs + owners[e_idx]
+    size = n_chars * n_funcs
+    total = np.bincount(cell, minlength=size)
+    missed = np.bincount(cell[~hit[e_idx]], minlength=size)
+    return ((total > 0) & (missed == 0)).reshape(n_chars, n_funcs).T
+
+
+# returns candidates[pos, c] for every flag position. hash is a byte
+# array, so output.txt only keeps idx & 0xff and main() refuses flags
+# longer than 0x100 where positions would fold together
+def Candidates(consistent, rets, order, functions, hashes, flag_len):
+    call_of = {name: k for k, name in enumerate(order)}
+    calls = np.array([call_of[name] for name in functions])
+    # idx & 0xff for checker f if it saw character c
+    low = (hashes[calls][:, None] ^ (rets & 0xFF)) & 0xFF
+
+    f_idx, c_idx = np.nonzero(consistent)
+    by_low = np.zeros((0x100, consistent.shape[1]), dtype=bool)
+    by_low[low[f_idx, c_idx], c_idx] = True
+    return by_low[:flag_len]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that a generated kamoi challenge can be solved from its bitmap."
+    )
+    parser.add_argument("--bitmap", type=str, default="/challenge/fuzz_bitmap")
+    parser.add_argument("--output-txt", type=str, default="/challenge/output.txt")
+    parser.add_argument("--edge-ids", type=str, default="/challenge/edge_ids.txt")
+    parser.add_argument("--manifest", type=str, default="/challenge/manifest.json")
+    parser.add_argument("--binary", type=str, default="/challenge/chall")
+    parser.add_argument("--showmap", type=str, default=AFL_SHOWMAP)
+    parser.add_argument("--probes", type=str, help="load/save probe bitmaps (.npy)")
+    parser.add_argument("--expect", type=str, help="file holding the real flag")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with open(args.manifest, "r") as fp:
+        manifest = json.load(fp)
+    flag_len = manifest["flag_len"]
+    if flag_len > 0x100:
+        parser.error(
+            "flag is %d bytes; output.txt only records positions mod 256, "
+            "so this check needs a flag of at most 256" % flag_len
+        )
+    rets = np.array(manifest["rets"], dtype=np.uint32)
+    chars = np.nonzero(rets.any(axis=0))[0]
+    rets = rets[:, chars]
+
+    if args.probes and os.path.exists(args.probes):
+        probes = np.load(args.probes, mmap_mode="r")
+    else:
+        probes = Probe(args.binary, args.showmap, flag_len, chars.tolist(), args.jobs)
+        if args.probes:
+            np.save(args.probes, probes)
+
+    bitmap = LoadBitmap(args.bitmap)
+    owners = LoadEdgeOwners(args.edge_ids, manifest["functions"], len(bitmap))
+    consistent = ConsistentChars(bitmap, probes, owners)
+    candidates = Candidates(
+        consistent,
+        rets,
+        manifest["order"],
+        manifest["functions"],
+        LoadOutput(args.output_txt),
+        flag_len,
+    )
+
+    counts = candidates.sum(axis=1)
+    solvable = bool((counts == 1).all())
+    for pos in np.nonzero(counts != 1)[0]:
+        print(
+            "position %d: %d candidates %r"
+            % (pos, counts[pos], bytes(chars[candidates[pos]].tolist()))
+        )
+
+    if args.expect:
+        with open(args.expect, "rb") as fp:
+            flag = np.frombuffer(fp.read()[:flag_len], dtype=np.uint8)
+        expected = np.minimum(np.searchsorted(chars, flag), len(chars) - 1)
+        found = candidates[np.arange(flag_len), expected] & (chars[expected] == flag)
+        if not found.all():
+            solvable = False
+            print("flag character ruled out at %s" % np.nonzero(~found)[0].tolist())
+
+    print("%s: %d positions" % ("solvable" if solvable else "NOT solvable", flag_len))
+    return 0 if solvable else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,25 @@
 #!/usr/bin/exec-suid -- /usr/bin/python3 -I
 import os
-import uuid
+import json
+import shlex
 import random
 import string
+import hashlib
 import argparse
-from typing import List
+import contextlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List
 
 CHARSET = string.printable
 
-random.seed(0x1337)
+SEED = 0x1337
+
+AFL_CC = "/opt/AFLplusplus/afl-clang-lto"
+AFL_SHOWMAP = "/opt/AFLplusplus/afl-showmap"
+CFLAGS = ["-O0"]
+
+random.seed(SEED)
 
 
 def GetRandomChar():
@@ -19,11 +30,22 @@ def GetRandomRet():
     return random.randint(2**16, 2**17 - 1)
 
 
+# function names come from the seeded RNG so the
+# same seed and flag always produce the same source
+def GetFuncName(used):
+    while True:
+        name = "check_%08x" % random.getrandbits(32)
+        if name not in used:
+            used.add(name)
+            return name
+
+
 # each case will have a character and a return
 # value that ret will be set to
 class Case:
+    __slots__ = ("char", "ret")
+
     def __init__(self, char, ret) -> None:
-        self.id = uuid.uuid4()
         self.char = char
         self.ret = ret
 
@@ -43,19 +65,30 @@ class Case:
 
 # each switch will be a function with many cases
 class Switch:
-    def __init__(self, cases: List[Case]) -> None:
-        self.id = uuid.uuid4()
+    __slots__ = ("name", "cases")
+
+    def __init__(self, name: str, cases: List[Case]) -> None:
+        self.name = name
         self.cases = cases
 
     def get_func_name(self):
-        return "check_" + self.id.hex[:8]
+        return self.name
+
+    # case return value for every byte, 0 where there is no case
+    def get_rets(self) -> List[int]:
+        rets = [0] * 0x100
+        for case in self.cases:
+            rets[ord(case.char)] = case.ret
+        return rets
+
+    def iter_c(self) -> Iterator[str]:
+        yield "int %s(unsigned int idx)\x7b\nswitch(flag[idx])\x7b\n" % self.name
+        for case in self.cases:
+            yield case.to_c()
+        yield "\x7d\nreturn 0;\n\x7d\n\n"
 
     def to_c(self):
-        return (
-            "int %s(unsigned int idx)\x7b\nswitch(flag[idx])\x7b\n"
-            + "".join([case.to_c() for case in self.cases])
-            + "\x7d\nreturn 0;\n\x7d\n\n"
-        ) % self.get_func_name()
+        return "".join(self.iter_c())
 
     def __str__(self):
         return "Switch([%s, ... %d cases])" % (str(self.cases[0]), len(self.cases))
@@ -63,7 +96,7 @@ class Switch:
 
 # generate a switch with random cases
 # for a flag character
-def GenerateSwitch(char, n_cases):
+def GenerateSwitch(char, n_cases, used_names):
 
     cases = []
     r_chars = []
@@ -80,39 +113,309 @@ def GenerateSwitch(char, n_cases):
     for r_char in r_chars:
         cases.append(Case(r_char, GetRandomRet()))
 
-    return Switch(cases)
+    return Switch(GetFuncName(used_names), cases)
+
 
+# compact form of a switch: the case returns move into a 256 entry
+# table and the character is spelled out by one instrumented branch
+# per bit, tested in a random order, so the coverage bitmap still
+# pins down each flag character with 16 edges instead of ~100
+class Table:
+    __slots__ = ("name", "rets", "bits")
 
-FLAG = (
-    "Haha, you have a lot of knowledge about how AFL++'s instrumentation works. here is your flag %s"
-    % (open("/flag", "r").read().strip())
-)
+    def __init__(self, name: str, rets: List[int], bits: List[int]) -> None:
+        self.name = name
+        self.rets = rets
+        self.bits = bits
 
+    @classmethod
+    def from_switch(cls, switch: Switch) -> "Table":
+        bits = list(range(8))
+        random.shuffle(bits)
+        return cls(switch.name, switch.get_rets(), bits)
 
-def WriteSource(n_cases):
-    ret = (
-        '#include <stdio.h>\n#include <stdlib.h>\n#include <stdint.h>\n#include <unistd.h>\n#include <fcntl.h>\n#include <errno.h>\n\nstatic unsigned int *pool = NULL;\nstatic size_t pool_size = 0;\nstatic size_t next_index = 0;\nstatic unsigned int get_urandom_uint(void) {\nunsigned int val;\nint fd = open("/dev/urandom", O_RDONLY);\nif (fd < 0) {\nperror("open /dev/urandom");\nexit(1);\n}\nssize_t n = read(fd, &val, sizeof(val));\nclose(fd);\nif (n != sizeof(val)) {\nperror("read /dev/urandom");\nexit(1);\n}\nreturn val;\n}\nstatic void init_pool(size_t max) {\npool = malloc(max * sizeof(unsigned int));\nif (!pool) {\nperror("malloc");\nexit(1);\n}\npool_size = max;\nnext_index = 0;\nfor (size_t i = 0; i < max; i++)\npool[i] = i;\nfor (size_t i = max - 1; i > 0; i--) {\nunsigned int r = get_urandom_uint() %% (i + 1);\nunsigned int tmp = pool[i];\npool[i] = pool[r];\npool[r] = tmp;\n}\n}\nunsigned int g_rand(size_t max) {\nif (max == 0) {\nfprintf(stderr, "max must be > 0\\n");\nexit(1);\n}\n\nif (pool == NULL || pool_size != max)\ninit_pool(max);\n\nif (next_index >= pool_size)\ninit_pool(max);\n\nreturn pool[next_index++];\n}\n\n\n\nunsigned char flag[%d] = {0};\nunsigned char hash[%d] = {0};\nint ctr=0;void print_hex(unsigned char *buf, size_t len) {\nFILE* fp = fopen("output.txt", "w");\nif (!fp){\nprintf("Cannot write output.txt, contact admin\\n");\nexit(-1);\n}\nfor (size_t i = 0; i < len; i++) {\nfprintf(fp, "%%02x", buf[i]);\n}\nfclose(fp);\n}\n\n'
-        % (
-            len(FLAG) + 1,
-            len(FLAG),
+    def get_func_name(self):
+        return self.name
+
+    def get_rets(self) -> List[int]:
+        return self.rets
+
+    def iter_c(self) -> Iterator[str]:
+        yield "static const unsigned int %s_table[256] = \x7b" % self.name
+        yield ",".join("0x%x" % ret for ret in self.rets)
+        yield "\x7d;\n"
+        yield "int %s(unsigned int idx)\x7b\n" % self.name
+        yield "volatile int sink = 0;\nunsigned char c = flag[idx];\n"
+        for bit in self.bits:
+            yield "if (c & 0x%02x) sink = %d; else sink = %d;\n" % (
+                1 << bit,
+                2 * bit,
+                2 * bit + 1,
+            )
+        yield "if (%s_table[c]) hash[ctr++] = %s_table[c] ^ idx;\n" % (
+            self.name,
+            self.name,
         )
-    )
-    switches = []
+        yield "return 0;\n\x7d\n\n"
+
+    def to_c(self):
+        return "".join(self.iter_c())
+
+    def __str__(self):
+        return "Table(%s, bits %s)" % (self.name, self.bits)
+
+
+FLAG_FILE = "/flag"
+
+FLAG_FORMAT = "Haha, you have a lot of knowledge about how AFL++'s instrumentation works. here is your flag %s"
+
+FLAG = None
+
+
+def ReadFlag(path):
+    with open(path, "r") as fp:
+        return FLAG_FORMAT % fp.read().strip()
+
+
+# one flag per line, blank lines skipped
+def ReadFlags(path):
+    with open(path, "r") as fp:
+        return [FLAG_FORMAT % line.strip() for line in fp if line.strip()]
+
+
+SOURCE_HEADER = '#include <stdio.h>\n#include <stdlib.h>\n#include <stdint.h>\n#include <unistd.h>\n#include <fcntl.h>\n#include <errno.h>\n\nstatic unsigned int *pool = NULL;\nstatic size_t pool_size = 0;\nstatic size_t next_index = 0;\nstatic unsigned int get_urandom_uint(void) {\nunsigned int val;\nint fd = open("/dev/urandom", O_RDONLY);\nif (fd < 0) {\nperror("open /dev/urandom");\nexit(1);\n}\nssize_t n = read(fd, &val, sizeof(val));\nclose(fd);\nif (n != sizeof(val)) {\nperror("read /dev/urandom");\nexit(1);\n}\nreturn val;\n}\nstatic void init_pool(size_t max) {\npool = malloc(max * sizeof(unsigned int));\nif (!pool) {\nperror("malloc");\nexit(1);\n}\npool_size = max;\nnext_index = 0;\nfor (size_t i = 0; i < max; i++)\npool[i] = i;\nfor (size_t i = max - 1; i > 0; i--) {\nunsigned int r = get_urandom_uint() %% (i + 1);\nunsigned int tmp = pool[i];\npool[i] = pool[r];\npool[r] = tmp;\n}\n}\nunsigned int g_rand(size_t max) {\nif (max == 0) {\nfprintf(stderr, "max must be > 0\\n");\nexit(1);\n}\n\nif (pool == NULL || pool_size != max)\ninit_pool(max);\n\nif (next_index >= pool_size)\ninit_pool(max);\n\nreturn pool[next_index++];\n}\n\n\n\nunsigned char flag[%d] = {0};\nunsigned char hash[%d] = {0};\nint ctr=0;void print_hex(unsigned char *buf, size_t len) {\nFILE* fp = fopen("output.txt", "w");\nif (!fp){\nprintf("Cannot write output.txt, contact admin\\n");\nexit(-1);\n}\nfor (size_t i = 0; i < len; i++) {\nfprintf(fp, "%%02x", buf[i]);\n}\nfclose(fp);\n}\n\n'
+
+
+# shared declarations for sharded builds, included by main and every shard
+SHARD_HEADER = "extern unsigned char flag[%d];\nextern unsigned char hash[%d];\nextern int ctr;\n\n"
+
+
+# returns the header and shard paths that go with the main source,
+# or (None, []) for the single file layout
+def ShardSources(source, shards):
+    if shards <= 1:
+        return None, []
+    base = os.path.splitext(source)[0]
+    return base + ".h", ["%s_%d.c" % (base, i) for i in range(shards)]
+
+
+def WriteHeader(fp, func_names):
+    fp.write(SHARD_HEADER % (len(FLAG) + 1, len(FLAG)))
+    fp.writelines("int %s(unsigned int idx);\n" % name for name in func_names)
+
+
+# streams the generated C source to fp one switch at a time
+# instead of building it up in memory. with shard_fps the switch
+# functions are split into contiguous runs across those files and
+# main includes header for their prototypes. mode "table" emits
+# Table checkers instead of switches. when manifest is a dict it is
+# filled with what bitmap_check.py needs. returns the function names
+# in flag order
+def WriteSource(fp, n_cases, shard_fps=(), header=None, mode="switch", manifest=None):
+    fp.write(SOURCE_HEADER % (len(FLAG) + 1, len(FLAG)))
+
+    used_names = set()
+    func_names = []
     for idx, ch in enumerate(FLAG):
-        switches.append((idx, GenerateSwitch(ch, n_cases)))
-        ret += switches[-1][1].to_c()
+        checker = GenerateSwitch(ch, n_cases, used_names)
+        if mode == "table":
+            checker = Table.from_switch(checker)
+        if shard_fps:
+            shard_fps[idx * len(shard_fps) // len(FLAG)].writelines(checker.iter_c())
+        else:
+            fp.writelines(checker.iter_c())
+        func_names.append(checker.get_func_name())
+        if manifest is not None:
+            manifest.setdefault("rets", []).append(checker.get_rets())
+
+    if header:
+        fp.write('#include "%s"\n\n' % header)
+
+    fp.write("int main()\x7b\nfgets((char*)flag, sizeof(flag), stdin);\n\n")
+
+    order = list(func_names)
+    random.shuffle(order)
+
+    if manifest is not None:
+        manifest.update(
+            flag_len=len(FLAG), mode=mode, functions=func_names, order=order
+        )
 
-    ret += "int main()\x7b\nfgets((char*)flag, sizeof(flag), stdin);\n\n"
+    fp.writelines("%s(g_rand(%d));\n" % (name, len(FLAG)) for name in order)
+
+    fp.write('print_hex(hash, sizeof(hash));\nputs("");')
+    fp.write("return 0;\n")
+    fp.write("}")
+
+    return func_names
+
+
+def GenerateSources(source, n_cases, shards, mode="switch", manifest_path=None):
+    header, shard_sources = ShardSources(source, shards)
+    with contextlib.ExitStack() as stack:
+        fp = stack.enter_context(open(source, "w"))
+        shard_fps = [stack.enter_context(open(path, "w")) for path in shard_sources]
+        for shard_fp in shard_fps:
+            shard_fp.write('#include "%s"\n\n' % os.path.basename(header))
+        manifest = {} if manifest_path else None
+        func_names = WriteSource(
+            fp,
+            n_cases,
+            shard_fps,
+            header and os.path.basename(header),
+            mode,
+            manifest,
+        )
+
+    if manifest_path:
+        with open(manifest_path, "w") as fp:
+            json.dump(manifest, fp)
+
+    if header:
+        with open(header, "w") as fp:
+            WriteHeader(fp, func_names)
+
+
+# sharded sources are compiled to objects in parallel and only the
+# link runs the LTO instrumentation over the whole program. with full
+# LTO that single threaded link is most of the build, so sharding is
+# opt-in (--shards) and .init leaves it off until it is measured. with
+# edge_ids afl-clang-lto documents which function owns each edge.
+# cc may carry its own arguments, e.g. a stub like "python3 fakecc.py"
+def Compile(cc, source, shard_sources, binary, jobs, edge_ids=None):
+    cc = shlex.split(cc)
+    env = None
+    if edge_ids:
+        env = dict(os.environ, AFL_LLVM_DOCUMENT_IDS=edge_ids)
+
+    if not shard_sources:
+        subprocess.run([*cc, *CFLAGS, source, "-o", binary], check=True, env=env)
+        return
+
+    sources = [source] + shard_sources
+    objects = [os.path.splitext(path)[0] + ".o" for path in sources]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        procs = pool.map(
+            lambda src, obj: subprocess.run(
+                [*cc, *CFLAGS, "-c", src, "-o", obj], env=env
+            ),
+            sources,
+            objects,
+        )
+        for proc in procs:
+            proc.check_returncode()
+    subprocess.run([*cc, *CFLAGS, *objects, "-o", binary], check=True, env=env)
+
+
+# make a relative executable path in a command line absolute,
+# leaving bare names to the PATH lookup and its arguments alone
+def AbsCommand(command):
+    argv = shlex.split(command)
+    if argv and os.sep in argv[0]:
+        argv[0] = os.path.abspath(argv[0])
+    return shlex.join(argv)
+
+
+# compile the source and record its coverage bitmap for the flag input
+def BuildChallenge(
+    source,
+    shards,
+    binary,
+    bitmap,
+    input_file,
+    cc,
+    showmap,
+    jobs=None,
+    edge_ids=None,
+):
+    # showmap runs from the binary's directory, so everything it is
+    # handed has to survive the change of cwd
+    binary = os.path.abspath(binary)
+    bitmap = os.path.abspath(bitmap)
+    input_file = os.path.abspath(input_file)
+    showmap = AbsCommand(showmap)
+    if edge_ids:
+        edge_ids = os.path.abspath(edge_ids)
+
+    _, shard_sources = ShardSources(source, shards)
+    # the flag run also leaves the checker's output.txt next to the binary
+    workdir = os.path.dirname(binary)
+
+    Compile(cc, source, shard_sources, binary, jobs, edge_ids)
+    with open(input_file, "rb") as fp:
+        subprocess.run(
+            [*shlex.split(showmap), "-b", "-o", bitmap, "--", binary],
+            stdin=fp,
+            cwd=workdir,
+            check=True,
+        )
+
+
+# generate and build one batch variant in its own directory,
+# runs in a worker process so FLAG and the RNG are private to it
+def BuildVariant(name, flag, seed, args):
+    global FLAG
+    FLAG = flag
+    random.seed(seed)
 
-    random.shuffle(switches)
+    workdir = os.path.join(args.batch_dir, name)
+    os.makedirs(workdir, exist_ok=True)
+    source = os.path.join(workdir, "challenge.c")
+    input_file = os.path.join(workdir, "input.txt")
+    binary = os.path.join(workdir, "chall")
+    bitmap = os.path.join(workdir, "fuzz_bitmap")
 
-    for idx, switch in switches:
-        ret += "%s(g_rand(%d));\n" % (switch.get_func_name(), len(FLAG))
+    GenerateSources(source, 0x100, args.shards, args.mode)
+    with open(input_file, "w") as fp:
+        fp.write(FLAG)
+    BuildChallenge(
+        source,
+        args.shards,
+        binary,
+        bitmap,
+        input_file,
+        args.cc,
+        args.showmap,
+        1,
+    )
 
-    ret += 'print_hex(hash, sizeof(hash));\nputs("");'
-    ret += "return 0;\n"
-    ret += "}"
-    return ret
+    with open(binary, "rb") as fp:
+        digest = hashlib.sha256(fp.read()).hexdigest()
+    return {
+        "name": name,
+        "seed": seed,
+        "flag_sha256": hashlib.sha256(FLAG.encode()).hexdigest(),
+        "dir": workdir,
+        "binary": binary,
+        "bitmap": bitmap,
+        "output": os.path.join(workdir, "output.txt"),
+        "binary_sha256": digest,
+    }
+
+
+# build every flag x seed combination across a bounded process pool
+# and write a manifest of what was produced. variants that fail are
+# recorded with their error instead of stopping the batch
+def BuildBatch(flags, seeds, args):
+    variants = [
+        ("v%04d" % i, flag, seed)
+        for i, (flag, seed) in enumerate((f, s) for f in flags for s in seeds)
+    ]
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            (name, seed, pool.submit(BuildVariant, name, flag, seed, args))
+            for name, flag, seed in variants
+        ]
+        for name, seed, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"name": name, "seed": seed, "error": repr(e)})
+
+    with open(os.path.join(args.batch_dir, "manifest.json"), "w") as fp:
+        json.dump(results, fp, indent=2)
+    return results
 
 
 def main():
@@ -123,15 +426,75 @@ def main():
 
     parser.add_argument("--cases", type=int, default=0xFE)
     parser.add_argument("--source", type=str, default="challenge.c")
+    parser.add_argument("--mode", choices=("switch", "table"), default="switch")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=lambda x: int(x, 0), default=SEED)
+    parser.add_argument("--flag-file", type=str, default=FLAG_FILE)
+    parser.add_argument("--input", type=str, default="/challenge/input.txt")
+    parser.add_argument("--build", action="store_true")
+    parser.add_argument("--output", type=str, default="/challenge/chall")
+    parser.add_argument("--bitmap", type=str, default="/challenge/fuzz_bitmap")
+    parser.add_argument("--cc", type=str, default=AFL_CC)
+    parser.add_argument("--showmap", type=str, default=AFL_SHOWMAP)
+    parser.add_argument("--manifest", type=str)
+    parser.add_argument("--edge-ids", type=str)
+    parser.add_argument("--batch-dir", type=str)
+    parser.add_argument("--flags", type=str)
+    parser.add_argument(
+        "--seeds", type=lambda x: [int(seed, 0) for seed in x.split(",")]
+    )
 
     args = parser.parse_args()
+
+    # under exec-suid any caller gets root, so refuse the options that
+    # run other programs or read other files; those are for offline use
+    if os.geteuid() != os.getuid():
+        privileged = {
+            "--cc": args.cc != AFL_CC,
+            "--showmap": args.showmap != AFL_SHOWMAP,
+            "--flag-file": args.flag_file != FLAG_FILE,
+            "--flags": args.flags is not None,
+            "--batch-dir": args.batch_dir is not None,
+        }
+        refused = [option for option, given in privileged.items() if given]
+        if refused:
+            parser.error("%s not allowed when setuid" % ", ".join(refused))
+
+    if args.batch_dir:
+        flags = ReadFlags(args.flags) if args.flags else [ReadFlag(args.flag_file)]
+        args.batch_dir = os.path.abspath(args.batch_dir)
+        os.makedirs(args.batch_dir, exist_ok=True)
+        results = BuildBatch(flags, args.seeds or [args.seed], args)
+        failed = [result["name"] for result in results if "error" in result]
+        print("built %d variants" % (len(results) - len(failed)))
+        if failed:
+            print("failed: %s" % ", ".join(failed))
+        return
+
+    global FLAG
+    FLAG = ReadFlag(args.flag_file)
+
+    random.seed(args.seed)
     if args.cases:
-        with open(args.source, "w") as fp:
-            fp.write(WriteSource(0x100))
+        GenerateSources(args.source, 0x100, args.shards, args.mode, args.manifest)
 
-    with open("/challenge/input.txt", "w") as fp:
+    with open(args.input, "w") as fp:
         fp.write(FLAG)
 
+    if args.build:
+        BuildChallenge(
+            args.source,
+            args.shards,
+            args.output,
+            args.bitmap,
+            args.input,
+            args.cc,
+            args.showmap,
+            args.jobs,
+            args.edge_ids,
+        )
+
     # os.system("/opt/AFLplusplus/afl-clang-lto -O0 %s -o /challenge/chall" % args.source)
 
 
@@ -1,13 +1,58 @@
 import textwrap
 
 import requests
-import os
+import shutil
+import sys
 import time
 from server import DHKECrypto, TicTacToeServer, create_encrypted_data
 
 
+class Renderer:
+    """Draws frames in place with ANSI escapes, rewriting only the lines that changed.
+
+    Each frame goes out as one buffered write. Anything printed below the
+    frame (prompts, messages) is wiped on the next render.
+    """
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        # [(line, screen row)] of the last frame, None after a clear
+        self.frame = None
+
+    def clear(self):
+        self.stream.write("\x1b[H\x1b[2J")
+        self.stream.flush()
+        self.frame = None
+
+    def render(self, lines):
+        width = max(shutil.get_terminal_size().columns, 1)
+        out = []
+        prev = self.frame
+        if prev is None:
+            out.append("\x1b[H\x1b[2J")
+            prev = []
+
+        frame = []
+        row = 1
+        for i, line in enumerate(lines):
+            # a line that wraps pushes everything below it down, and the changed
+            # row then forces those lines to be redrawn too
+            if i >= len(prev) or prev[i] != (line, row):
+                out.append(f"\x1b[{row};1H{line}\x1b[K")
+            frame.append((line, row))
+            row += max(1, -(-len(line) // width))
+
+        out.append(f"\x1b[{row};1H\x1b[J")
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.frame = frame
+
+
+screen = Renderer()
+
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    screen.clear()
 
 
 def handshake(base_url, cached_b, username):
@@ -18,8 +63,22 @@ def handshake(base_url, cached_b, username):
     i = handshake_resp['i']
     _handshake = p, g, ga, i
     shared_secret, gb, cached_b = DHKECrypto.continue_handshake(_handshake, cached_b=cached_b)
-    requests.post(f"{base_url}/complete_handshake", json={'username': username, 'gb': gb, 'i': i})
-    return shared_secret, cached_b
+    complete_resp = requests.post(f"{base_url}/complete_handshake", json={'username': username, 'gb': gb, 'i': i}).json()
+    return shared_secret, cached_b, complete_resp.get('ticket')
+
+
+def place_piece(base_url, username, password, session, x, y):
+    # Moves resume the session with its ticket; when the server asks for a
+    # rekey, handshake again and resend the move once.
+    data = {"password": password, "x": x, "y": y}
+    enc_data = create_encrypted_data(data, username, session['shared_secret'], session['ticket'])
+    response = requests.post(f"{base_url}/place_piece", json=enc_data)
+    if response.status_code == 401 and response.json().get('rekey'):
+        session['shared_secret'], session['cached_b'], session['ticket'] = handshake(
+            base_url, session['cached_b'], username)
+        enc_data = create_encrypted_data(data, username, session['shared_secret'], session['ticket'])
+        response = requests.post(f"{base_url}/place_piece", json=enc_data)
+    return response
 
 
 def start_new_game(base_url):
@@ -29,24 +88,29 @@ def start_new_game(base_url):
     clear_screen()
 
 
-def print_board(board):
-    print("\n  0   1   2")
+def board_lines(board):
+    lines = ["", "  0   1   2"]
     for i, row in enumerate(board):
-        print(f"{i}  " + " | ".join(row))
+        lines.append(f"{i}  " + " | ".join(row))
         if i < 2:
-            print("  ---+---+---")
+            lines.append("  ---+---+---")
+    return lines
+
+def game_state_lines(board, current_player, trash_talk):
+    lines = ["", "Current Board:"]
+    lines += board_lines(board)
+    lines.append("")
+    lines.append(f"Current Player: {current_player}")
+    if trash_talk:
+        lines.append(f'{TicTacToeServer.BOT_USERNAME} says: "{trash_talk}"')
+    lines.append("")
+    return lines
 
 def print_game_state(board, current_player, trash_talk):
-    print("\nCurrent Board:")
-    print_board(board)
-    print("")
-    print(f"Current Player: {current_player}")
-    if trash_talk:
-        print(f'{TicTacToeServer.BOT_USERNAME} says: "{trash_talk}"')
-    print("")
+    screen.render(game_state_lines(board, current_player, trash_talk))
 
 
-def play_game(base_url, username, password, shared_secret):
+def play_game(base_url, username, password, session):
     game_start = None
     tied = False
     last_board = None
@@ -64,27 +128,27 @@ def play_game(base_url, username, password, shared_secret):
         elif game_start != curr_game_start:
             # game reset only happens when the bot wins or there's a tie
             if not tied:
-                print_game_state(last_board, current_player, trash_talk)
-                print("You lost! Better luck next time.")
+                screen.render(
+                    game_state_lines(last_board, current_player, trash_talk)
+                    + ["You lost! Better luck next time."]
+                )
                 input("Press enter to continue...")
-                clear_screen()
             game_start = curr_game_start
             tied = False
 
         board = board_response['board']
         last_board = board
-        print_game_state(board, current_player, trash_talk)
+        frame = game_state_lines(board, current_player, trash_talk)
 
         # Check if it's the player's turn
         if move_response['current_player'] == "X":
+            screen.render(frame)
             user_input = input("Enter your move (row,col) or 'q' to quit: ")
             if user_input.lower() == 'q':
                 break
             try:
                 x, y = map(int, user_input.split(","))
-                data = {"password": password, "x": x, "y": y}
-                enc_data = create_encrypted_data(data, username, shared_secret)
-                response = requests.post(f"{base_url}/place_piece", json=enc_data)
+                response = place_piece(base_url, username, password, session, x, y)
                 resp_json = response.json()
                 won = resp_json.get('won', None)
                 tie = resp_json.get('tie', None)
@@ -97,11 +161,10 @@ def play_game(base_url, username, password, shared_secret):
             except ValueError:
                 print("Invalid input. Please enter in the format 'row,col'.")
         else:
-            print(f"Waiting for {TicTacToeServer.BOT_USERNAME}'s move...")
+            # only the changed cells and the trash talk line get redrawn
+            screen.render(frame + [f"Waiting for {TicTacToeServer.BOT_USERNAME}'s move..."])
             time.sleep(2)
 
-        clear_screen()
-
 def read_log(base_url):
     response = requests.get(f"{base_url}/read_log")
     log = response.json()
@@ -153,7 +216,8 @@ def main():
         print("Server is not running. Please start the server and try again.")
         return
 
-    shared_secret, cached_b = handshake(base_url, None, username)
+    shared_secret, cached_b, ticket = handshake(base_url, None, username)
+    session = {'shared_secret': shared_secret, 'cached_b': cached_b, 'ticket': ticket}
 
     clear_screen()
     display_start_banner()
@@ -169,7 +233,7 @@ def main():
             start_new_game(base_url)
         elif choice == "2":
             clear_screen()
-            play_game(base_url, username, password, shared_secret)
+            play_game(base_url, username, password, session)
             clear_screen()
         elif choice == "3":
             read_log(base_url)
@@ -1,6 +1,7 @@
 #!/usr/bin/exec-suid -- /usr/bin/python3 -I
 
 import math
+import secrets
 import string
 import json
 import base64
@@ -23,6 +24,39 @@ from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 app = Flask(__name__)
 
 
+class FixedBaseTable:
+    """Precomputed g^(d * 2^(8k)) mod p, so g^e costs one multiply per exponent byte."""
+
+    WINDOW = 8
+
+    def __init__(self, g: int, p: int, bits: int):
+        self.g = g
+        self.p = p
+        self.rows = []
+        base = g
+        for _ in range(-(-bits // self.WINDOW)):
+            row = [1]
+            for _ in range(1, 1 << self.WINDOW):
+                row.append(row[-1] * base % p)
+            self.rows.append(row)
+            base = row[-1] * base % p
+
+    def pow(self, e: int):
+        if e >> (self.WINDOW * len(self.rows)):
+            return pow(self.g, e, self.p)
+        p = self.p
+        mask = (1 << self.WINDOW) - 1
+        acc = 1
+        for row in self.rows:
+            if not e:
+                break
+            digit = e & mask
+            if digit:
+                acc = acc * row[digit] % p
+            e >>= self.WINDOW
+        return acc
+
+
 class DHKECrypto:
     #
     # Server-side
@@ -31,6 +65,8 @@ class DHKECrypto:
     def __init__(self):
         self.p = self.random_prime(2**128)
         self.g = primitive_root(self.p)
+        # shared by every user's first handshake
+        self.g_table = FixedBaseTable(self.g, self.p, self.p.bit_length())
 
         # [username] -> (shared_key)
         self.keys = {}
@@ -38,6 +74,10 @@ class DHKECrypto:
         self.iterations = defaultdict(int)
         # [username] -> (a)
         self.cached_a_prime = {}
+        # [username] -> (iteration, g^(a + iteration)) of the last handshake
+        self.handshakes = {}
+        # [username] -> (ticket, shared_key, expires, moves)
+        self.tickets = {}
 
     def start_handshake(self, username: str):
         curr_i = self.iterations[username]
@@ -46,8 +86,16 @@ class DHKECrypto:
         self.iterations[username] += 1
         user_a = int(self.cached_a_prime[username] + curr_i)
 
+        # consecutive exponents differ by one, so the next g^a is one multiply away
+        last = self.handshakes.get(username)
+        if last is not None and last[0] == curr_i - 1:
+            g_a = last[1] * self.g % self.p
+        else:
+            g_a = self.g_table.pow(user_a)
+        self.handshakes[username] = (curr_i, g_a)
+
         # -> (public p, public g, g^a, iteration)
-        return self.p, self.g, pow(self.g, user_a, self.p), curr_i
+        return self.p, self.g, g_a, curr_i
 
     def complete_handshake(self, username: str, g_b: int, iteration: int):
         # <- (g^b, iteration)
@@ -59,8 +107,33 @@ class DHKECrypto:
         self.keys[username] = shared_key
         return True
 
-    def decrypt(self, ct: bytes, username: str):
-        shared_secret = self.keys[username].to_bytes(16, 'big')
+    def issue_ticket(self, username: str, lifetime: float):
+        # a ticket resumes the session on the key just agreed; a new
+        # handshake replaces the user's previous ticket
+        ticket = secrets.token_urlsafe(16)
+        self.tickets[username] = (ticket, self.keys[username], time.time() + lifetime, 0)
+        return ticket
+
+    def resume(self, username: str, ticket: str, rekey_interval: int):
+        # -> shared key of the ticket's session, or None if the client has to re-handshake
+        entry = self.tickets.get(username)
+        if entry is None or not secrets.compare_digest(entry[0], ticket):
+            return None
+        _, shared_key, expires, moves = entry
+        if time.time() >= expires or moves >= rekey_interval:
+            del self.tickets[username]
+            return None
+        return shared_key
+
+    def count_move(self, username: str, ticket: str):
+        entry = self.tickets.get(username)
+        if entry is not None and entry[0] == ticket:
+            self.tickets[username] = entry[:3] + (entry[3] + 1,)
+
+    def decrypt(self, ct: bytes, username: str, shared_key: int = None):
+        if shared_key is None:
+            shared_key = self.keys[username]
+        shared_secret = shared_key.to_bytes(16, 'big')
         key = HKDF(algorithm=SHA256(), length=32, info=None, salt=None).derive(shared_secret)
         iv = b"\x00" * 16
         cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
@@ -74,13 +147,21 @@ class DHKECrypto:
     # Client-side
     #
 
+    # [(p, g, b)] -> (iteration, g^(b + iteration)) of the last handshake
+    client_handshakes = {}
+
     @staticmethod
     def continue_handshake(handshake: tuple, cached_b: int = None):
         p, g, g_a, i = handshake
         if cached_b is None:
             cached_b = DHKECrypto.random_prime(p-1)
         b = cached_b + i
-        g_b = pow(g, b, p)
+        last = DHKECrypto.client_handshakes.get((p, g, cached_b))
+        if last is not None and last[0] == i - 1:
+            g_b = last[1] * g % p
+        else:
+            g_b = pow(g, b, p)
+        DHKECrypto.client_handshakes[(p, g, cached_b)] = (i, g_b)
         shared_key = pow(g_a, b, p)
         return shared_key.to_bytes(16, 'big'), g_b, cached_b
 
@@ -110,8 +191,16 @@ class TicTacToeServer:
     PLAYER_PASSWORD = "i_luv_t0_win"
     BOT_USERNAME = "mahaloz"
 
-    def __init__(self, bot_password: str = None):
+    # Session tickets: seconds a ticket is valid, and moves before the user has to re-handshake
+    TICKET_LIFETIME = 300
+    REKEY_INTERVAL = 4
+
+    def __init__(self, bot_password: str = None, ticket_lifetime: float = TICKET_LIFETIME,
+                 rekey_intervals: dict = None):
         self.dhke = DHKECrypto()
+        self.ticket_lifetime = ticket_lifetime
+        # [username] -> moves per ticket, REKEY_INTERVAL otherwise
+        self.rekey_intervals = rekey_intervals or {}
         self.creds = {}
         self.logs = []
 
@@ -174,10 +263,10 @@ class TicTacToeServer:
             """
         ))
 
-    def decrypt_request(self, encrypted_request, username):
+    def decrypt_request(self, encrypted_request, username, shared_key=None):
         decoded_data = base64.b64decode(encrypted_request.get('encrypted_data').encode())
         try:
-            data = self.dhke.decrypt(decoded_data, username)
+            data = self.dhke.decrypt(decoded_data, username, shared_key)
         except Exception as e:
             return None
         data = json.loads(data)
@@ -203,7 +292,13 @@ class TicTacToeServer:
         i = data.get('i')
         self.dhke.complete_handshake(username, gb, i)
         self.log_action("complete_handshake", data)
-        return jsonify({'success': True})
+        ticket = self.dhke.issue_ticket(username, self.ticket_lifetime)
+        return jsonify({
+            'success': True,
+            'ticket': ticket,
+            'ticket_lifetime': self.ticket_lifetime,
+            'rekey_interval': self.rekey_intervals.get(username, self.REKEY_INTERVAL),
+        })
 
     # Game APIs
 
@@ -229,8 +324,18 @@ class TicTacToeServer:
     def place_piece(self):
         encrypted_request = request.get_json()
         username = encrypted_request.get('username')
+        ticket = encrypted_request.pop('ticket', None)
         self.log_action("place_piece", encrypted_request)
-        data = self.decrypt_request(encrypted_request, username)
+
+        # moves that carry a session ticket skip the handshake and use the ticket's key
+        shared_key = None
+        if ticket is not None:
+            rekey_interval = self.rekey_intervals.get(username, self.REKEY_INTERVAL)
+            shared_key = self.dhke.resume(username, ticket, rekey_interval)
+            if shared_key is None:
+                return jsonify({'message': 'Session expired, handshake again', "error": True, "rekey": True}), 401
+
+        data = self.decrypt_request(encrypted_request, username, shared_key)
         if data is None:
             return jsonify({'message': 'Decryption failed', "error": True}), 400
 
@@ -253,6 +358,8 @@ class TicTacToeServer:
         if self.current_player == "O" and username != self.BOT_USERNAME:
             return jsonify({'message': 'Only the bot can play as O', "error": True}), 403
 
+        if ticket is not None:
+            self.dhke.count_move(username, ticket)
         self.board[x][y] = self.current_player
         self.moves += 1
         if self.check_winner():
@@ -330,15 +437,18 @@ class TicTacToeServer:
 # Useful Client-side code
 #
 
-def create_encrypted_data(data: dict, username: str, shared_secret: bytes) -> dict:
+def create_encrypted_data(data: dict, username: str, shared_secret: bytes, ticket: str = None) -> dict:
     enc_data = {}
     enc_data['username'] = username
     str_data = json.dumps(data)
     enc_data['encrypted_data'] = base64.b64encode(DHKECrypto.encrypt(str_data, shared_secret)).decode()
+    if ticket is not None:
+        enc_data['ticket'] = ticket
     return enc_data
 
 
 def handshake(base_url, cached_b, username):
+    # -> (shared_secret, cached_b, session ticket)
     handshake_resp = requests.post(f"{base_url}/start_handshake", json={"username": username}).json()
     p = handshake_resp['p']
     g = handshake_resp['g']
@@ -346,8 +456,8 @@ def handshake(base_url, cached_b, username):
     i = handshake_resp['i']
     _handshake = p, g, ga, i
     shared_secret, gb, cached_b = DHKECrypto.continue_handshake(_handshake, cached_b=cached_b)
-    requests.post(f"{base_url}/complete_handshake", json={'username': username, 'gb': gb, 'i': i})
-    return shared_secret, cached_b
+    complete_resp = requests.post(f"{base_url}/complete_handshake", json={'username': username, 'gb': gb, 'i': i}).json()
+    return shared_secret, cached_b, complete_resp.get('ticket')
 
 #
 # The Bot: a minmax agent
@@ -430,6 +540,8 @@ def bot_client(password):
     base_url = "http://127.0.0.1:5000"
     username = TicTacToeServer.BOT_USERNAME
     cached_b = None
+    shared_secret = None
+    ticket = None
     total_moves = 0
     time.sleep(5) # Wait for the server to start
     print("Bot is ready!")
@@ -445,13 +557,14 @@ def bot_client(password):
         print("Bot is thinking...")
         time.sleep(3)  # Simulate bot thinking time
 
-        # Handshake with the server
-        shared_secret, cached_b = handshake(base_url, cached_b, username)
+        # Handshake with the server, unless the last session can be resumed
+        if ticket is None or total_moves == 2:
+            shared_secret, cached_b, ticket = handshake(base_url, cached_b, username)
 
         if total_moves == 2:
             trash_talk_text = f"Looks like you need a handicap. Shared Secret: {int.from_bytes(shared_secret, 'big')}"
             # re-handshake with the server
-            shared_secret, cached_b = handshake(base_url, cached_b, username)
+            shared_secret, cached_b, ticket = handshake(base_url, cached_b, username)
         else:
             trash_talk_text = random.choice(trash_talk)
 
@@ -471,8 +584,12 @@ def bot_client(password):
             "x": x,
             "y": y
         }
-        move_data = create_encrypted_data(move_data, username, shared_secret)
-        response = requests.post(f"{base_url}/place_piece", json=move_data)
+        response = requests.post(f"{base_url}/place_piece",
+                                 json=create_encrypted_data(move_data, username, shared_secret, ticket))
+        if response.status_code == 401 and response.json().get('rekey'):
+            shared_secret, cached_b, ticket = handshake(base_url, cached_b, username)
+            response = requests.post(f"{base_url}/place_piece",
+                                     json=create_encrypted_data(move_data, username, shared_secret, ticket))
         total_moves += 1
         if response.status_code == 200:
             print(f"Bot played ({x}, {y})")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Measure doubleblindside throughput as the pre-fork worker count grows.
+
+For every worker count the portal is started with ``WORKERS=<n>`` on a free
+port, then a pool of client processes hammers ``/api/login`` and, with the
+cookie from one login, the authenticated ``/dashboard`` page.
+
+Run it inside the challenge container (it needs ``/flag`` and the seeded
+``/challenge/conference.db`` that ``app.py`` expects):
+
+    python3 tools/bench_doubleblindside.py --app /challenge/app.py --workers 1,2,4,8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import requests
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"portal at {base_url} did not come up")
+
+
+def _login_loop(base_url: str, username: str, password: str, duration: float) -> int:
+    done = 0
+    session = requests.Session()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        resp = session.post(
+            f"{base_url}/api/login",
+            json={"username": username, "password": password},
+        )
+        if resp.ok:
+            done += 1
+    return done
+
+
+def _page_loop(base_url: str, token: str, duration: float) -> int:
+    done = 0
+    session = requests.Session()
+    session.cookies.set("session_token", token)
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        resp = session.get(f"{base_url}/dashboard", allow_redirects=False)
+        if resp.status_code == 200:
+            done += 1
+    return done
+
+
+def _run_phase(clients: int, func, *args) -> int:
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(func, *args) for _ in range(clients)]
+        return sum(future.result() for future in futures)
+
+
+def bench(
+    app_path: str,
+    workers: int,
+    clients: int,
+    duration: float,
+    username: str,
+    password: str,
+) -> Tuple[float, float]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # Every client logs in from 127.0.0.1, so switch the auth rate limiter off.
+    env = dict(
+        os.environ,
+        WORKERS=str(workers),
+        PORT=str(port),
+        PORTAL_AUTH_RATE_PER_SEC="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, app_path],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base_url)
+        logins = _run_phase(
+            clients, _login_loop, base_url, username, password, duration
+        )
+        token = requests.post(
+            f"{base_url}/api/login",
+            json={"username": username, "password": password},
+        ).json()["token"]
+        pages = _run_phase(clients, _page_loop, base_url, token, duration)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=10)
+    return logins / duration, pages / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="/challenge/app.py")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--username", default="author_claire")
+    parser.add_argument("--password", default="paperpower")
+    args = parser.parse_args()
+
+    counts: List[int] = [int(n) for n in args.workers.split(",")]
+    print(f"{'workers':>8} {'logins/s':>10} {'pages/s':>10}")
+    for count in counts:
+        logins, pages = bench(
+            args.app, count, args.clients, args.duration, args.username, args.password
+        )
+        print(f"{count:>8} {logins:>10.1f} {pages:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
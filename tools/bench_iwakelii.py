@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmarks for the iwakelii challenge server.
+
+``startup`` compares time-to-first-byte for cold-spawned and pre-forked
+workers. Cold mode starts a fresh interpreter per connection, like the stock
+``/challenge/chall.py``; forked mode connects to one ``chall.py --serve``
+parent. Run it where ``/flag`` exists (ideally with ``/challenge/params.pool``
+generated):
+
+    python3 tools/bench_iwakelii.py startup --chall /challenge/chall.py
+
+``rounds`` measures the server-side cost of one exchange with the ladder
+alone, with the fixed-base table, and when served from the precomputed queue:
+
+    python3 tools/bench_iwakelii.py rounds --chall challenges-25/iwakelii/chall.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cold_ttfb(chall: str) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, chall],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    proc.stdout.read(1)
+    elapsed = time.perf_counter() - start
+    proc.kill()
+    proc.wait()
+    return elapsed
+
+
+def _forked_ttfb(port: int) -> float:
+    start = time.perf_counter()
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        conn.recv(1)
+        return time.perf_counter() - start
+
+
+def _wait_listening(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("chall.py --serve did not start listening")
+
+
+def _report(label: str, samples: List[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(
+        f"{label:>8}: median {statistics.median(ms):8.2f} ms"
+        f"  p95 {p95:8.2f} ms  ({len(ms)} samples)"
+    )
+
+
+def bench_startup(chall: str, trials: int) -> None:
+    _report("cold", [_cold_ttfb(chall) for _ in range(trials)])
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, chall, "--serve", f"127.0.0.1:{port}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_listening(port)
+        _report("forked", [_forked_ttfb(port) for _ in range(trials)])
+    finally:
+        server.kill()
+        server.wait()
+
+
+def _load_chall(path: str):
+    spec = importlib.util.spec_from_file_location("iwakelii_chall", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_rounds(chall_path: str, trials: int) -> None:
+    chall = _load_chall(chall_path)
+    r, _p, E, G = chall.load_pooled_params() or chall.generate_params()
+
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        chall.make_round(E, G, r)
+        samples.append(time.perf_counter() - start)
+    _report("ladder", samples)
+
+    start = time.perf_counter()
+    table = chall.FixedBaseTable(E, G, r.bit_length())
+    print(
+        f"{'':>8}  (fixed-base table built in {(time.perf_counter() - start) * 1000:.2f} ms)"
+    )
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        chall.make_round(E, G, r, table)
+        samples.append(time.perf_counter() - start)
+    _report("table", samples)
+
+    rounds: queue.Queue = queue.Queue()
+    chall.precompute_rounds(E, G, r, trials, rounds)
+    samples = []
+    for _ in range(trials):
+        start = time.perf_counter()
+        rounds.get()
+        samples.append(time.perf_counter() - start)
+    _report("queued", samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    startup = sub.add_parser("startup", help="time-to-first-byte per connection")
+    startup.add_argument("--chall", default="/challenge/chall.py")
+    startup.add_argument("--trials", type=int, default=20)
+    rounds = sub.add_parser("rounds", help="server-side latency of one exchange")
+    rounds.add_argument("--chall", default="/challenge/chall.py")
+    rounds.add_argument("--trials", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        bench_startup(args.chall, args.trials)
+    elif args.command == "rounds":
+        bench_rounds(args.chall, args.trials)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare the kamoi switch and table checkers: build time, size and coverage.
+
+Each mode is generated into a scratch directory from the same flag and seed,
+compiled, and (when ``afl-showmap`` is available) run once on the flag input
+to time the instrumented run and count the edges it hits:
+
+    python3 tools/bench_kamoi.py --gen challenges-25/kamoi/genbinary-switch.py \\
+        --flag-file /flag --shards 4
+
+Without AFL++ installed, pass ``--cc cc`` to compare plain builds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional, Tuple
+
+AFL_CC = "/opt/AFLplusplus/afl-clang-lto"
+AFL_SHOWMAP = "/opt/AFLplusplus/afl-showmap"
+
+
+def _timed(argv, **kwargs) -> float:
+    start = time.perf_counter()
+    subprocess.run(argv, check=True, **kwargs)
+    return time.perf_counter() - start
+
+
+def _showmap(
+    showmap: str, binary: str, input_file: str, workdir: str
+) -> Tuple[float, int]:
+    bitmap = os.path.join(workdir, "fuzz_bitmap")
+    with open(input_file, "rb") as fp:
+        elapsed = _timed(
+            [showmap, "-b", "-o", bitmap, "--", binary],
+            stdin=fp,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=workdir,
+        )
+    with open(bitmap, "rb") as fp:
+        edges = sum(1 for byte in fp.read() if byte)
+    return elapsed, edges
+
+
+def bench(
+    gen: str,
+    mode: str,
+    args: argparse.Namespace,
+    workdir: str,
+) -> Tuple[float, float, int, Optional[float], Optional[int]]:
+    source = os.path.join(workdir, "challenge.c")
+    binary = os.path.join(workdir, "chall")
+    input_file = os.path.join(workdir, "input.txt")
+
+    gen_time = _timed(
+        [
+            sys.executable,
+            gen,
+            "--mode",
+            mode,
+            "--shards",
+            str(args.shards),
+            "--seed",
+            str(args.seed),
+            "--flag-file",
+            args.flag_file,
+            "--source",
+            source,
+            "--input",
+            input_file,
+        ]
+    )
+    sources = [source]
+    if args.shards > 1:
+        sources += [
+            os.path.join(workdir, f"challenge_{i}.c") for i in range(args.shards)
+        ]
+    build_time = _timed([args.cc, "-O0", *sources, "-o", binary])
+    size = os.path.getsize(binary)
+
+    run_time = edges = None
+    if args.showmap and os.path.exists(args.showmap):
+        run_time, edges = _showmap(args.showmap, binary, input_file, workdir)
+    return gen_time, build_time, size, run_time, edges
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gen", default="challenges-25/kamoi/genbinary-switch.py")
+    parser.add_argument("--flag-file", default="/flag")
+    parser.add_argument("--seed", default="0x1337")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--cc", default=AFL_CC)
+    parser.add_argument("--showmap", default=AFL_SHOWMAP)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>8} {'gen s':>8} {'build s':>8} {'size KiB':>9}"
+        f" {'run ms':>8} {'edges':>6}"
+    )
+    for mode in ("switch", "table"):
+        with tempfile.TemporaryDirectory() as workdir:
+            gen_time, build_time, size, run_time, edges = bench(
+                args.gen, mode, args, workdir
+            )
+        run = f"{run_time * 1000:8.1f}" if run_time is not None else f"{'-':>8}"
+        hit = f"{edges:6d}" if edges is not None else f"{'-':>6}"
+        print(
+            f"{mode:>8} {gen_time:8.2f} {build_time:8.2f} {size / 1024:9.1f}"
+            f" {run} {hit}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure tickeyhellman handshake cost with many users re-handshaking.
+
+Every user starts one handshake and then re-handshakes ``--rounds`` times,
+interleaved across users the way the bot and players hit the server. The
+baseline recomputes ``pow(g, a + i, p)`` for every handshake, as the server
+used to; the current path is ``DHKECrypto.start_handshake``. The client side
+(``continue_handshake``) is timed the same way:
+
+    python3 tools/bench_tickeyhellman.py --server challenges/tickeyhellman/server.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import time
+
+
+def _load_server(path: str):
+    spec = importlib.util.spec_from_file_location("tickeyhellman_server", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _report(label: str, elapsed: float, handshakes: int) -> None:
+    print(
+        f"{label:>18}: {elapsed * 1000:9.1f} ms"
+        f"  {elapsed / handshakes * 1e6:7.2f} us/handshake"
+    )
+
+
+def bench_server(server, users: int, rounds: int) -> None:
+    dhke = server.DHKECrypto()
+    names = [f"user{n}" for n in range(users)]
+    handshakes = users * rounds
+
+    # Both paths re-handshake from iteration 1 with the same exponents; the
+    # first handshake (which draws a_prime) is timed separately below.
+    for name in names:
+        dhke.start_handshake(name)
+    a_primes = [dhke.cached_a_prime[name] for name in names]
+
+    start = time.perf_counter()
+    for i in range(1, rounds + 1):
+        for a in a_primes:
+            pow(dhke.g, a + i, dhke.p)
+    _report("server baseline", time.perf_counter() - start, handshakes)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            dhke.start_handshake(name)
+    _report("server incremental", time.perf_counter() - start, handshakes)
+
+    start = time.perf_counter()
+    for a in a_primes:
+        pow(dhke.g, a, dhke.p)
+    _report("first pow()", time.perf_counter() - start, users)
+    start = time.perf_counter()
+    for a in a_primes:
+        dhke.g_table.pow(a)
+    _report("first fixed-base", time.perf_counter() - start, users)
+
+
+def bench_client(server, users: int, rounds: int) -> None:
+    dhke = server.DHKECrypto()
+    p, g = dhke.p, dhke.g
+    g_a = pow(g, 12345, p)
+    bs = [server.DHKECrypto.random_prime(p - 1) for _ in range(users)]
+    handshakes = users * (rounds + 1)
+
+    start = time.perf_counter()
+    for i in range(rounds + 1):
+        for b in bs:
+            pow(g, b + i, p)
+            pow(g_a, b + i, p)
+    _report("client baseline", time.perf_counter() - start, handshakes)
+
+    server.DHKECrypto.client_handshakes.clear()
+    start = time.perf_counter()
+    for i in range(rounds + 1):
+        for b in bs:
+            server.DHKECrypto.continue_handshake((p, g, g_a, i), cached_b=b)
+    _report("client incremental", time.perf_counter() - start, handshakes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", default="/challenge/server.py")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    server = _load_server(args.server)
+    bench_server(server, args.users, args.rounds)
+    bench_client(server, args.users, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
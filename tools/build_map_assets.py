@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Build the optimized 2025 island-map images and their manifest.
+
+Every island layer in ``assets/25/challenges/{light,medium,color}`` is a
+full-canvas RGBA PNG that is transparent outside the island. Each layer is
+cropped to its alpha bounding box and the crops of one level are packed into
+a single sprite sheet, at full and at half scale. The ocean background is
+resized into a ``srcset`` ladder. Every image is written as lossless WebP,
+plus an AVIF copy when that comes out smaller, under a content-hashed name.
+The AVIF copy is lossy on purpose (quality 90, no chroma subsampling):
+Pillow cannot write lossless AVIF, and at quality 100 it is already larger
+than the lossless WebP. ``--lossless`` skips it so every served image is
+pixel-exact.
+``manifest.json`` lists the files and where each island sits on the canvas:
+
+    python3 tools/build_map_assets.py --dojo dojo.yml
+
+``--dojo`` also regenerates the map markup between the ``map-assets``
+markers in ``dojo.yml`` from the manifest. Requires Pillow with WebP (and
+ideally AVIF) support.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image, features
+
+ASSETS_DIR = "assets/25"
+OUT_DIR = "assets/25/dist"
+BASE_URL = "https://github.com/pwncollege/acsac-ctf-dojo/blob/main"
+BACKGROUND = "Background_flip.png"
+BACKGROUND_WIDTHS = (590, 1180, 2360)
+# src for browsers without srcset support
+FALLBACK_WIDTH = 1180
+
+# (page id, file stem) in the order the map lists them; the page ids are what
+# dojo.yml's script and SVG overlay use.
+ISLANDS = (
+    ("halulu", "halulu"),
+    ("hokupaa", "hokupaa"),
+    ("iwakelii", "iwakelii"),
+    ("ka-heihei-ona-keiki", "ka-hei-hei-ona-keiki"),
+    ("ka-lupe-o-kawelo", "ka-lupe-o-kawelo"),
+    ("ka-moi", "ka_moi"),
+    ("kaahupahau", "kaahupahau"),
+    ("kukalaniehu", "kukalaniehu"),
+    ("manaiakalani", "manaiakalani"),
+    ("compass", "compass"),
+)
+
+# level -> (file suffix, alt text, classes besides the level and island id)
+LEVELS = {
+    "light": ("L1", "unsolved", "unsolved {island}-current"),
+    "color": ("L3", "solved", "unsolved hide"),
+    "medium": ("L2", "medium", "hide"),
+}
+
+# Transparent space between frames so scaled sheets don't bleed; even so it
+# survives the half-scale sheet.
+GUTTER = 4
+SHEET_WIDTH = 2048
+# Lossy; only served where it beats the lossless WebP (see the module docs).
+AVIF_QUALITY = 90
+
+MARKER_BEGIN = "<!-- map-assets:begin -->"
+MARKER_END = "<!-- map-assets:end -->"
+
+
+def _even_box(box: Tuple[int, int, int, int], size: Tuple[int, int]) -> Tuple[int, ...]:
+    # Even edges keep every frame on whole pixels in the half-scale sheet.
+    left, top, right, bottom = box
+    return (
+        left & ~1,
+        top & ~1,
+        min(size[0], (right + 1) & ~1),
+        min(size[1], (bottom + 1) & ~1),
+    )
+
+
+def _pack(
+    sizes: List[Tuple[int, int]],
+) -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+    """Shelf-pack frames, tallest first; return their offsets and the sheet size."""
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions: List[Tuple[int, int]] = [(0, 0)] * len(sizes)
+    x = y = shelf = width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > SHEET_WIDTH:
+            x, y, shelf = 0, y + shelf + GUTTER, 0
+        positions[i] = (x, y)
+        x += w + GUTTER
+        shelf = max(shelf, h)
+        width = max(width, x - GUTTER)
+    height = y + shelf
+    return positions, ((width + 1) & ~1, (height + 1) & ~1)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        image.save(buffer, format="WEBP", lossless=True, quality=100, method=6)
+    else:
+        image.save(
+            buffer, format="AVIF", quality=AVIF_QUALITY, subsampling="4:4:4", speed=4
+        )
+    return buffer.getvalue()
+
+
+def _write_variants(
+    image: Image.Image, stem: str, out_dir: str, avif: bool
+) -> List[Dict[str, Any]]:
+    """Write ``image`` as WebP (and AVIF when smaller) under content-hashed names."""
+    variants = []
+    webp_size = None
+    for fmt in ("avif", "webp") if avif else ("webp",):
+        data = _encode(image, fmt)
+        if fmt == "webp":
+            webp_size = len(data)
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{stem}.{digest[:12]}.{fmt}"
+        path = os.path.join(out_dir, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as fp:
+                fp.write(data)
+        variants.append(
+            {
+                "file": name,
+                "type": f"image/{fmt}",
+                "width": image.width,
+                "height": image.height,
+                "bytes": len(data),
+                "sha256": digest,
+            }
+        )
+    if avif and variants[0]["bytes"] >= webp_size:
+        # Not worth a second download path; the lossless WebP wins.
+        os.unlink(os.path.join(out_dir, variants[0]["file"]))
+        del variants[0]
+    return variants
+
+
+def build_background(assets_dir: str, out_dir: str, avif: bool) -> Dict[str, Any]:
+    with Image.open(os.path.join(assets_dir, BACKGROUND)) as source:
+        source.load()
+        variants = []
+        for width in BACKGROUND_WIDTHS:
+            if width >= source.width:
+                image = source
+            else:
+                height = round(source.height * width / source.width)
+                image = source.resize((width, height), Image.Resampling.LANCZOS)
+            variants += _write_variants(image, f"background-{width}", out_dir, avif)
+        return {"size": list(source.size), "variants": variants}
+
+
+def build_level(
+    level: str, assets_dir: str, out_dir: str, avif: bool
+) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+    suffix = LEVELS[level][0]
+    crops = []
+    canvas = None
+    for island, stem in ISLANDS:
+        path = os.path.join(assets_dir, "challenges", level, f"{stem}_{suffix}.png")
+        with Image.open(path) as layer:
+            layer = layer.convert("RGBA")
+        if canvas is None:
+            canvas = layer.size
+        elif layer.size != canvas:
+            raise ValueError(f"{path}: {layer.size} does not match canvas {canvas}")
+        box = _even_box(layer.getchannel("A").getbbox() or (0, 0, 2, 2), layer.size)
+        crops.append((island, box, layer.crop(box)))
+
+    positions, sheet_size = _pack([crop.size for _, _, crop in crops])
+    sheet = Image.new("RGBA", sheet_size, (0, 0, 0, 0))
+    frames = {}
+    for (island, box, crop), (x, y) in zip(crops, positions):
+        sheet.paste(crop, (x, y))
+        frames[island] = {"sheet": [x, y, crop.width, crop.height], "canvas": list(box)}
+
+    half = sheet.resize((sheet.width // 2, sheet.height // 2), Image.Resampling.LANCZOS)
+    entry = {
+        "size": list(sheet_size),
+        "frames": frames,
+        "variants": {
+            "1x": _write_variants(half, f"{level}-half", out_dir, avif),
+            "2x": _write_variants(sheet, f"{level}", out_dir, avif),
+        },
+    }
+    return entry, canvas
+
+
+def build(assets_dir: str, out_dir: str, lossless: bool = False) -> Dict[str, Any]:
+    os.makedirs(out_dir, exist_ok=True)
+    avif = not lossless and features.check("avif")
+    manifest: Dict[str, Any] = {
+        "background": build_background(assets_dir, out_dir, avif),
+        "levels": {},
+    }
+    for level in LEVELS:
+        manifest["levels"][level], canvas = build_level(
+            level, assets_dir, out_dir, avif
+        )
+        manifest["canvas"] = list(canvas)
+    return manifest
+
+
+def _prune(out_dir: str, manifest: Dict[str, Any]) -> None:
+    # Hashed names change with the content; drop the ones no longer referenced.
+    keep = {"manifest.json"}
+    keep.update(v["file"] for v in manifest["background"]["variants"])
+    for level in manifest["levels"].values():
+        for variants in level["variants"].values():
+            keep.update(v["file"] for v in variants)
+    for name in os.listdir(out_dir):
+        if name not in keep:
+            os.unlink(os.path.join(out_dir, name))
+
+
+def _pct(value: float) -> str:
+    return f"{value * 100:.4f}".rstrip("0").rstrip(".") + "%"
+
+
+def _url(base_url: str, out_dir: str, name: str) -> str:
+    return f"{base_url}/{out_dir}/{name}?raw=true"
+
+
+def _background_image(
+    base_url: str, out_dir: str, variants: Dict[str, List[Dict[str, Any]]]
+) -> List[str]:
+    """CSS declarations for a sheet: a plain WebP url, then an ``image-set``."""
+    first = next(v for v in next(iter(variants.values())) if v["type"] == "image/webp")
+    candidates = [
+        f'url("{_url(base_url, out_dir, v["file"])}") type("{v["type"]}") {density}'
+        for density, group in variants.items()
+        for v in group
+    ]
+    return [
+        f'background-image: url("{_url(base_url, out_dir, first["file"])}");',
+        f"background-image: image-set({', '.join(candidates)});",
+    ]
+
+
+def render_markup(manifest: Dict[str, Any], base_url: str, out_dir: str) -> str:
+    """Return the ocean <picture>, the sprite CSS and one <div> per island layer."""
+    canvas_w, canvas_h = manifest["canvas"]
+    background = manifest["background"]
+    lines = [
+        "<style>",
+        ".island_container .sprite {",
+        "background-repeat: no-repeat;",
+        "}",
+    ]
+    for level in LEVELS:
+        entry = manifest["levels"][level]
+        # light is on screen at first paint; medium and color wait for the
+        # map script to add load-<level> to the container.
+        scope = (
+            ".island_container"
+            if level == "light"
+            else f".island_container.load-{level}"
+        )
+        # Once zoomed in (hires), every screen gets the full-scale sheet.
+        hires = {"1x": entry["variants"]["2x"]}
+        lines += [
+            f"{scope} .sprite.{level} {{",
+            *_background_image(base_url, out_dir, entry["variants"]),
+            "}",
+            f"{scope}.hires .sprite.{level} {{",
+            *_background_image(base_url, out_dir, hires),
+            "}",
+        ]
+    lines.append("</style>")
+
+    sources: Dict[str, List[str]] = {}
+    for v in background["variants"]:
+        sources.setdefault(v["type"], []).append(
+            f"{_url(base_url, out_dir, v['file'])} {v['width']}w"
+        )
+    fallback = [
+        v
+        for v in background["variants"]
+        if v["type"] == "image/webp" and v["width"] <= FALLBACK_WIDTH
+    ][-1]
+    picture = ["<picture>"]
+    for mime, candidates in sources.items():
+        if mime != "image/webp":
+            picture.append(
+                f'<source type="{mime}" srcset="{", ".join(candidates)}" sizes="100vw">'
+            )
+    picture.append(
+        f'<img class="ocean" src="{_url(base_url, out_dir, fallback["file"])}"'
+        f' srcset="{", ".join(sources["image/webp"])}" sizes="100vw"'
+        f' width="{canvas_w}" height="{canvas_h}" fetchpriority="high"'
+        f' decoding="async" alt="Background" id="baseImage">'
+    )
+    picture.append("</picture>")
+    lines.append("".join(picture))
+
+    for island, _stem in ISLANDS:
+        for level, (_suffix, alt, classes) in LEVELS.items():
+            entry = manifest["levels"][level]
+            sheet_w, sheet_h = entry["size"]
+            x, y, w, h = entry["frames"][island]["sheet"]
+            left, top, _right, _bottom = entry["frames"][island]["canvas"]
+            style = ";".join(
+                [
+                    f"left:{_pct(left / canvas_w)}",
+                    f"top:{_pct(top / canvas_h)}",
+                    f"width:{_pct(w / canvas_w)}",
+                    f"height:{_pct(h / canvas_h)}",
+                    f"background-size:{_pct(sheet_w / w)} {_pct(sheet_h / h)}",
+                    "background-position:"
+                    f"{_pct(x / (sheet_w - w) if sheet_w > w else 0)} "
+                    f"{_pct(y / (sheet_h - h) if sheet_h > h else 0)}",
+                ]
+            )
+            lines.append(
+                f'<div class="island sprite {level} {classes.format(island=island)}'
+                f' {island}" id="{island}-{level}" role="img"'
+                f' aria-label="{island} {alt}" style="{style}"></div>'
+            )
+    return "\n".join(lines)
+
+
+def update_dojo(path: str, markup: str) -> None:
+    with open(path, "r") as fp:
+        text = fp.read()
+    pattern = re.compile(
+        rf"^(?P<indent>[ \t]*){re.escape(MARKER_BEGIN)}\n.*?^[ \t]*{re.escape(MARKER_END)}$",
+        re.M | re.S,
+    )
+    match = pattern.search(text)
+    if not match:
+        raise SystemExit(f"{path}: no {MARKER_BEGIN} ... {MARKER_END} block")
+    indent = match.group("indent")
+    block = "\n".join(
+        indent + line for line in [MARKER_BEGIN, *markup.splitlines(), MARKER_END]
+    )
+    with open(path, "w") as fp:
+        fp.write(text[: match.start()] + block + text[match.end() :])
+
+
+def _groups(manifest: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    groups = [manifest["background"]["variants"]]
+    for entry in manifest["levels"].values():
+        groups += list(entry["variants"].values())
+    return groups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", default=ASSETS_DIR)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--dojo", help="rewrite the map-assets block in this dojo.yml")
+    parser.add_argument(
+        "--lossless", action="store_true", help="skip the lossy AVIF copies"
+    )
+    args = parser.parse_args()
+
+    if not features.check("webp"):
+        raise SystemExit("Pillow was built without WebP support")
+    manifest = build(args.assets, args.out, args.lossless)
+    with open(os.path.join(args.out, "manifest.json"), "w") as fp:
+        json.dump(manifest, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+    _prune(args.out, manifest)
+    if args.dojo:
+        update_dojo(args.dojo, render_markup(manifest, args.base_url, args.out))
+
+    written = sum(v["bytes"] for group in _groups(manifest) for v in group)
+    print(f"wrote {written / 1024:.0f} KiB of variants to {args.out}")
+    # What a typical first paint fetches: the ocean at FALLBACK_WIDTH and the
+    # 1x light sheet, each in the smallest format on offer.
+    first = min(
+        v["bytes"]
+        for v in manifest["background"]["variants"]
+        if v["width"] == FALLBACK_WIDTH
+    ) + min(v["bytes"] for v in manifest["levels"]["light"]["variants"]["1x"])
+    print(f"first paint: {first / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Render the island-map module descriptions in dojo.yml from assets/maps.yml.
+
+Each map in ``assets/maps.yml`` is a module id with its islands, the
+challenge each one opens, its clickable polygon and the layer images. The
+page markup is generated from that, with ``assets/map.css`` and the shared
+runtime ``assets/map.js`` minified and inlined, and written between the
+module's ``map-page`` markers:
+
+    python3 tools/build_map_pages.py
+
+Maps with ``sprites`` take their layers from the manifest written by
+``tools/build_map_assets.py``. ``--check`` only reports whether dojo.yml is
+up to date.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+import yaml
+
+from build_map_assets import BASE_URL, LEVELS, MARKER_BEGIN, MARKER_END, render_markup
+
+DATA = "assets/maps.yml"
+CSS = "assets/map.css"
+RUNTIME = "assets/map.js"
+DOJO = "dojo.yml"
+
+# Whitespace next to these can go; anywhere else it still separates tokens.
+JS_PUNCTUATION = set("{}()[];,:=<>!&|?*%^~")
+CSS_PUNCTUATION = set("{};,>")
+
+PANEL = """\
+<div class="hide" id="current-challenge">
+<span class="close">X</span>
+<h1 class="title">Challenge Title</h1>
+<h2 class="pwn-solves">0</h2>
+<h4 class="points">500</h4>
+<h4 class="num-solves">0</h4>
+<p class="challenge-description">
+  {placeholder}
+</p>
+<div class="container">
+  <div class="accordion accordion-item" id="challenges">
+    <div class="row">
+      <div class="col-sm-6 form-group text-center">
+        <button id="challenge-start" type="submit" class="btn btn-md btn-outline-secondary w-100">
+          <span class="d-sm-block d-md-block d-lg-block">
+            <i class="fas fa-play fa-2x pr-3"></i>Start
+          </span>
+        </button>
+      </div>
+      <div class="col-sm-6 form-group text-center">
+        <button id="challenge-practice" type="submit" class="btn btn-md btn-outline-secondary w-100">
+          <span class="d-sm-block d-md-block d-lg-block">
+            <i class="fas fa-flask fa-2x pr-3"></i>Practice
+          </span>
+        </button>
+      </div>
+    </div>
+    <div class="row submit-row">
+      <div class="col-md-9 form-group">
+        <input id="module" type="hidden" value="">
+        <input id="challenge" type="hidden" value="">
+        <input id="challenge-id" type="hidden" value="">
+        <input id="challenge-input" class="challenge-input form-control" type="text" name="answer" placeholder="Flag">
+      </div>
+      <div class="col-md-3 form-group key-submit">
+        <button id="challenge-submit" type="submit" class="challenge-submit btn btn-md btn-outline-secondary float-right w-100 h-100">
+          Submit
+        </button>
+      </div>
+    </div>
+    <div class="row notification-row">
+      <div class="col-md-12">
+        <div id="result-notification" class="alert alert-dismissable text-center w-100" role="alert" style="display: none;">
+          <strong id="result-message"></strong>
+        </div>
+      </div>
+    </div>
+  </div>
+</div>
+</div>"""
+
+
+def _minify(source: str, punctuation: set, line_comments: bool) -> str:
+    """Drop comments and collapse whitespace, leaving string literals alone.
+
+    Not a general minifier: it does not understand regex literals, which
+    ``assets/map.js`` avoids.
+    """
+    out: List[str] = []
+    gap = ""
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if source.startswith("/*", i):
+            end = source.index("*/", i + 2)
+            gap = gap or " "
+            i = end + 2
+            continue
+        if line_comments and source.startswith("//", i):
+            end = source.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if c.isspace():
+            gap = "\n" if c == "\n" or gap == "\n" else " "
+            i += 1
+            continue
+        if c in "\"'`":
+            j = i + 1
+            while source[j] != c:
+                j += 2 if source[j] == "\\" else 1
+            token = source[i : j + 1]
+            i = j + 1
+        else:
+            token = c
+            i += 1
+        if (
+            gap
+            and out
+            and out[-1][-1] not in punctuation
+            and token[0] not in punctuation
+        ):
+            out.append(gap)
+        gap = ""
+        out.append(token)
+    return "".join(out)
+
+
+def minify_js(source: str) -> str:
+    return _minify(source, JS_PUNCTUATION, line_comments=True)
+
+
+def minify_css(source: str) -> str:
+    return _minify(source, CSS_PUNCTUATION, line_comments=False)
+
+
+def _image_layers(page: Dict[str, Any]) -> List[str]:
+    def url(src: str) -> str:
+        return quote(page["image_base"] + src, safe=":/")
+
+    lines = [
+        f'<img class="ocean" src="{url(page["ocean"])}" fetchpriority="high"'
+        ' decoding="async" alt="Background" id="baseImage">'
+    ]
+    for decoration in page.get("decorations", ()):
+        lines.append(
+            f'<img class="island" src="{url(decoration["src"])}" alt=""'
+            f' id="{decoration["id"]}">'
+        )
+    for island in page["islands"]:
+        name = island["id"]
+        for level, (_suffix, alt, classes) in LEVELS.items():
+            # Hidden layers are display:none, so lazy ones wait until shown.
+            lazy = "" if level == "light" else ' loading="lazy"'
+            lines.append(
+                f'<img class="island {level} {classes.format(island=name)} {name}"'
+                f' src="{url(island["images"][level])}"{lazy} decoding="async"'
+                f' alt="{name} {alt}" id="{name}-{level}">'
+            )
+    return lines
+
+
+def render_page(page: Dict[str, Any], css: str, runtime: str) -> List[str]:
+    theme = f"#current-challenge{{background:{page['panel_background']}}}"
+    if "cursor" in page:
+        theme += f".overlay-svg .island:hover{{cursor:{page['cursor']}}}"
+    lines = [
+        '<div style="display: flex; justify-content: center; position: relative;'
+        ' padding-bottom: 15ex;">',
+        f"<style>{css}{theme}</style>",
+        *PANEL.format(placeholder=page["placeholder"]).splitlines(),
+        '<div class="island_container" id="island_container">',
+    ]
+    if "sprites" in page:
+        with open(page["sprites"], "r") as fp:
+            manifest = json.load(fp)
+        lines.append(MARKER_BEGIN)
+        lines += render_markup(
+            manifest, BASE_URL, os.path.dirname(page["sprites"])
+        ).splitlines()
+        lines.append(MARKER_END)
+    else:
+        lines += _image_layers(page)
+
+    lines.append(
+        '<svg class="overlay-svg" xmlns="http://www.w3.org/2000/svg"'
+        f' viewBox="{page["viewbox"]}">'
+    )
+    for island in page["islands"]:
+        lines.append(
+            f'<polygon class="island {island["id"]}" points="{island["polygon"]}"'
+            ' fill="transparent" />'
+        )
+    lines += ["</svg>", "</div>", "</div>"]
+
+    config = {
+        "islands": {i["id"]: i["challenge"] for i in page["islands"]},
+        "points": {
+            i["challenge"]: i["ctf_points"]
+            for i in page["islands"]
+            if "ctf_points" in i
+        },
+        "solves": {
+            i["challenge"]: i["ctf_solves"]
+            for i in page["islands"]
+            if "ctf_solves" in i
+        },
+    }
+    # "</" would end the inline <script> early.
+    config_js = json.dumps(config, separators=(",", ":")).replace("</", "<\\/")
+    lines.append(f"<script>{runtime}({config_js});</script>")
+    return lines
+
+
+def update_page(text: str, module: str, lines: List[str]) -> str:
+    begin = f"<!-- map-page:begin {module} -->"
+    end = f"<!-- map-page:end {module} -->"
+    pattern = re.compile(
+        rf"^(?P<indent>[ \t]*){re.escape(begin)}\n.*?^[ \t]*{re.escape(end)}$",
+        re.M | re.S,
+    )
+    match = pattern.search(text)
+    if not match:
+        raise SystemExit(f"no {begin} ... {end} block in the dojo file")
+    indent = match.group("indent")
+    block = "\n".join(indent + line for line in [begin, *lines, end])
+    return text[: match.start()] + block + text[match.end() :]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DATA)
+    parser.add_argument("--dojo", default=DOJO)
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 if the dojo file is stale"
+    )
+    args = parser.parse_args()
+
+    with open(args.data, "r") as fp:
+        pages = yaml.safe_load(fp)
+    with open(CSS, "r") as fp:
+        css = minify_css(fp.read())
+    with open(RUNTIME, "r") as fp:
+        runtime = minify_js(fp.read())
+    with open(args.dojo, "r") as fp:
+        original = fp.read()
+
+    text = original
+    for module, page in pages.items():
+        text = update_page(text, module, render_page(page, css, runtime))
+
+    if args.check:
+        if text != original:
+            print(f"{args.dojo} is out of date; run {sys.argv[0]}")
+            sys.exit(1)
+        return
+    if text != original:
+        with open(args.dojo, "w") as fp:
+            fp.write(text)
+    print(f"runtime: {len(runtime)} bytes minified, shared by {len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
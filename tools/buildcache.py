@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Prebuild the binaries that challenge .init scripts compile or patch.
+
+A cacheable build step in ``.init`` is a single line of this form:
+
+    sha256sum --status -c /challenge/.prebuilt/NAME.sha256 2>/dev/null && cp -p /challenge/.prebuilt/NAME OUTPUT || COMMAND
+
+(``sudo`` may prefix ``cp`` and ``COMMAND``). At container start
+``sha256sum`` checks that the step's inputs, toolchain and ``.init`` itself
+(so the command line is part of the key: editing a flag without refilling
+falls back to building) are byte-for-byte the ones the artifact was built
+from. On a match, the artifact is copied into place. Otherwise ``COMMAND``
+runs exactly as before. Nothing but coreutils is needed in the container.
+The artifacts are committed with the challenge, so every container gets
+its own copy and a player with root in one container has no shared cache
+to poison for the others. Until they are, every step just runs ``COMMAND``.
+
+Run this inside the challenge image, so the recorded compiler matches the
+one containers have, and commit the resulting ``.prebuilt`` directories:
+
+    python3 tools/buildcache.py
+
+Steps run in .init order against a scratch copy of the challenge, which
+``/challenge`` is symlinked to while they run, so that path must be free
+(and writable, so run as root). Each manifest records the command, the
+hashes of ``/challenge/.init``, of the ``/challenge`` files the command names
+(plus the challenge's C headers for compiler commands) and of the
+executables it runs.
+``--check`` only reports steps whose manifest is missing or no longer
+matches the command and sources in this tree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+CHALLENGE = "/challenge"
+PREBUILT = ".prebuilt"
+FLAG_FILE = "/flag"
+COMPILERS = re.compile(r"^(?:.*-)?(?:cc|gcc|g\+\+|clang|clang\+\+)(?:-[\d.]+)?$")
+# The programs a compiler driver hands off to; they shape the output too.
+# cc1 is left out: packages pin it to the driver's exact version, and
+# hashing its ~30 MB at every start would cost more than small compiles.
+COMPILER_PROGS = ("as", "ld")
+
+STEP = re.compile(
+    r"^sha256sum --status -c (?P<manifest>\S+) 2>/dev/null"
+    r" && (?:sudo )?cp -p (?P<artifact>\S+) (?P<output>\S+)"
+    r" \|\| (?:sudo )?(?P<command>.+?)\s*$"
+)
+
+
+class Step(NamedTuple):
+    manifest: str
+    artifact: str
+    output: str
+    command: str
+
+
+def parse_steps(init: str) -> List[Step]:
+    with open(init, "r") as fp:
+        return [
+            Step(**match.groupdict())
+            for match in map(STEP.match, fp.read().splitlines())
+            if match
+        ]
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _local(path: str, challenge_dir: str) -> str:
+    """Map a ``/challenge/...`` path to the same file under ``challenge_dir``."""
+    return os.path.join(challenge_dir, os.path.relpath(path, "/challenge"))
+
+
+def step_inputs(
+    step: Step, challenge_dir: str, produced: Sequence[str] = ()
+) -> List[str]:
+    """The ``/challenge`` files ``step`` reads, as container paths.
+
+    That is ``.init``, which holds the command, and every file the command
+    names that exists or that an earlier step in ``produced`` writes (a file
+    patched in place included), except ``-o`` targets, plus the C headers
+    for a compiler.
+    """
+    argv = shlex.split(step.command)
+    dash_o = {argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "-o"}
+    inputs = ["/challenge/.init"] + [
+        arg
+        for arg in argv[1:]
+        if arg.startswith("/challenge/")
+        and arg not in dash_o
+        and (arg in produced or os.path.isfile(_local(arg, challenge_dir)))
+    ]
+    if COMPILERS.match(os.path.basename(argv[0])):
+        for header in sorted(glob.glob(os.path.join(challenge_dir, "*.h"))):
+            inputs.append("/challenge/" + os.path.basename(header))
+    return sorted(set(inputs))
+
+
+def step_tools(command: str) -> List[str]:
+    """Resolved paths of the executables that run for ``command``."""
+    argv = shlex.split(command)
+    program = shutil.which(argv[0])
+    if program is None:
+        return []
+    tools = [os.path.realpath(program)]
+    if COMPILERS.match(os.path.basename(argv[0])):
+        for prog in COMPILER_PROGS:
+            found = subprocess.run(
+                [program, f"-print-prog-name={prog}"],
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+            path = found if os.path.isabs(found) else shutil.which(found or prog)
+            if path and os.path.isfile(path):
+                tools.append(os.path.realpath(path))
+    return tools
+
+
+def render_manifest(step: Step, hashes: Dict[str, str]) -> str:
+    lines = [f"# {step.command}"]
+    lines += [f"{digest}  {path}" for path, digest in sorted(hashes.items())]
+    return "\n".join(lines) + "\n"
+
+
+def _read_flag() -> Optional[bytes]:
+    try:
+        with open(FLAG_FILE, "rb") as fp:
+            return fp.read().strip() or None
+    except OSError:
+        return None
+
+
+def fill(challenge_dir: str) -> List[str]:
+    """Build every cacheable step of one challenge; returns the failures.
+
+    The commands run unchanged from ``/``, as in .init, with ``/challenge``
+    pointing at a scratch copy so paths compiled into the output (debug
+    info, ``__FILE__``) are the ones a container would produce.
+    """
+    if os.path.lexists(CHALLENGE):
+        raise SystemExit(f"{CHALLENGE} already exists; fill in a clean image")
+    steps = parse_steps(os.path.join(challenge_dir, ".init"))
+    failures = []
+    flag = _read_flag()
+    with tempfile.TemporaryDirectory(prefix="buildcache-") as root:
+        scratch = os.path.join(root, "challenge")
+        shutil.copytree(challenge_dir, scratch, ignore=shutil.ignore_patterns(PREBUILT))
+        os.symlink(scratch, CHALLENGE)
+        try:
+            for step in steps:
+                failure = _fill_step(step, challenge_dir, flag)
+                if failure:
+                    failures.append(f"{os.path.basename(step.artifact)}: {failure}")
+        finally:
+            os.unlink(CHALLENGE)
+    return failures
+
+
+def _fill_step(step: Step, challenge_dir: str, flag: Optional[bytes]) -> str:
+    hashes = {path: _sha256(path) for path in step_inputs(step, CHALLENGE)}
+    tools = step_tools(step.command)
+    if not tools:
+        return f"{shlex.split(step.command)[0]} not found"
+    hashes.update((path, _sha256(path)) for path in tools)
+    if subprocess.run(["bash", "-c", step.command], cwd="/").returncode:
+        return f"failed: {step.command}"
+    if not os.path.isfile(step.output):
+        return f"{step.output} was not written"
+    with open(step.output, "rb") as fp:
+        if flag and flag in fp.read():
+            return "output contains the flag"
+    os.makedirs(os.path.join(challenge_dir, PREBUILT), exist_ok=True)
+    shutil.copy2(step.output, _local(step.artifact, challenge_dir))
+    with open(_local(step.manifest, challenge_dir), "w") as fp:
+        fp.write(render_manifest(step, hashes))
+    return ""
+
+
+def check(challenge_dir: str) -> List[str]:
+    """Steps whose manifest is missing or stale for this tree's sources."""
+    stale = []
+    # Outputs of earlier steps stand in for the files they produce.
+    produced: Dict[str, str] = {}
+    for step in parse_steps(os.path.join(challenge_dir, ".init")):
+        name = os.path.basename(step.artifact)
+        manifest = _local(step.manifest, challenge_dir)
+        artifact = _local(step.artifact, challenge_dir)
+        if not (os.path.isfile(manifest) and os.path.isfile(artifact)):
+            stale.append(f"{name}: not built")
+            continue
+        with open(manifest, "r") as fp:
+            lines = fp.read().splitlines()
+        recorded = {}
+        for line in lines[1:]:
+            digest, path = line.split("  ", 1)
+            recorded[path] = digest
+        expected = {
+            path: produced.get(path) or _sha256(_local(path, challenge_dir))
+            for path in step_inputs(step, challenge_dir, list(produced))
+        }
+        if lines[0] != f"# {step.command}":
+            stale.append(f"{name}: command changed")
+        elif any(recorded.get(path) != digest for path, digest in expected.items()):
+            stale.append(f"{name}: sources changed")
+        produced[step.output] = _sha256(artifact)
+    return stale
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--only", nargs="*", default=[], help="challenge names")
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 if any prebuilt is stale"
+    )
+    args = parser.parse_args()
+
+    problems = []
+    for init in sorted(glob.glob(os.path.join(args.repo, "challenges*", "*", ".init"))):
+        challenge_dir = os.path.dirname(init)
+        name = os.path.basename(challenge_dir)
+        if (args.only and name not in args.only) or not parse_steps(init):
+            continue
+        found = check(challenge_dir) if args.check else fill(challenge_dir)
+        problems += [f"{name}/{problem}" for problem in found]
+
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Fail when a doubleblindside named query plans a full table scan.
+
+Every query in ``QUERIES`` is run through ``EXPLAIN QUERY PLAN`` against the
+schema from ``init_db.py`` (or an existing database with ``--db``), using the
+portal's own ``check_query_plans``, so a dropped or mismatched index fails
+here instead of only being logged when the portal starts:
+
+    python3 tools/check_query_plans.py
+
+``app.py`` reads ``/flag`` and opens its database at import time, so only
+``QUERIES`` and ``check_query_plans`` are lifted out of its source; this runs
+anywhere with the standard library.
+"""
+
+from __future__ import annotations
+
+import __future__
+import argparse
+import ast
+import sqlite3
+import sys
+import typing
+from typing import Any, Dict, Sequence
+
+APP = "challenges-25/doubleblindside/app.py"
+INIT_DB = "challenges-25/doubleblindside/init_db.py"
+
+
+def _definitions(path: str, names: Sequence[str]) -> Dict[str, Any]:
+    """Execute just the top-level definitions of ``names`` from ``path``."""
+    with open(path, "r") as fp:
+        tree = ast.parse(fp.read(), path)
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            defined = [node.name]
+        elif isinstance(node, ast.AnnAssign):
+            defined = [getattr(node.target, "id", None)]
+        elif isinstance(node, ast.Assign):
+            defined = [getattr(target, "id", None) for target in node.targets]
+        else:
+            continue
+        if any(name in names for name in defined):
+            nodes.append(node)
+    namespace: Dict[str, Any] = {"sqlite3": sqlite3, **vars(typing)}
+    code = compile(
+        ast.Module(body=nodes, type_ignores=[]),
+        path,
+        "exec",
+        flags=__future__.annotations.compiler_flag,
+        dont_inherit=True,
+    )
+    exec(code, namespace)
+    missing = [name for name in names if name not in namespace]
+    if missing:
+        raise SystemExit(f"{path}: no top-level {', '.join(missing)}")
+    return namespace
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=APP)
+    parser.add_argument("--init-db", default=INIT_DB, help="source of SCHEMA_SQL")
+    parser.add_argument("--db", help="check against this database instead")
+    args = parser.parse_args()
+
+    app = _definitions(args.app, ["QUERIES", "check_query_plans"])
+    if args.db:
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(_definitions(args.init_db, ["SCHEMA_SQL"])["SCHEMA_SQL"])
+    try:
+        problems = app["check_query_plans"](conn)
+    finally:
+        conn.close()
+
+    for problem in problems:
+        print(problem)
+    print(f"{len(app['QUERIES'])} queries, {len(problems)} plan problems")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Time every challenge's .init script and rank the slowest startups.
+
+Each ``challenges*/<name>/.init`` runs in its own scratch root: the challenge
+directory is copied to ``<root>/challenge``, a stub flag is written to
+``<root>/flag``, and every reference to an isolated path (``/challenge``,
+``/flag``, ``/home/hacker`` and ``/tmp`` by default) in the script and in
+the copied challenge scripts is rewritten to point inside the root.
+``sudo`` is dropped, ``exec-suid`` shebangs become plain ones, and an
+interactive ``su`` is skipped. Scripts run in parallel, each in its own
+process group so servers an .init leaves running are stopped with it.
+
+Per-step wall time comes from bash xtrace with ``EPOCHREALTIME`` in ``PS4``;
+each traced command is charged the time until the next one starts, and is
+reported by its expanded text and the .init line it runs from (the calling
+line, for commands inside shell functions or sourced files):
+
+    python3 tools/profile_inits.py --jobs 4 --timeout 600
+
+Nothing is fetched: steps that need tools missing locally (afl-clang-lto,
+patchelf, ...) fail fast and show up in the report with the script's exit
+status. ``--map OLD=NEW`` rewrites further paths, e.g. to point a compiler at
+a local one. The .init scripts still run as the current user, so anything
+they touch outside the isolated paths is real; run this in a container.
+``HOME`` points into the scratch root; ``PYTHONUSERBASE`` is pinned to the
+caller's so user-site packages stay importable, but anything else read from
+the real home directory (tool configs, caches) is not, and steps relying on
+it can fail where a real container would not.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import signal
+import site
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ISOLATED_PATHS = ("/challenge", "/flag", "/home/hacker", "/tmp")
+STUB_FLAG = "pwn.college{profile_inits_stub_flag}\n"
+TRACE_SEP = "\x1f"
+
+# Sources the rewritten .init with xtrace going to its own file, so the
+# script's stdout/stderr stay untouched.
+WRAPPER = r"""
+exec 19>"$PROFILE_TRACE"
+BASH_XTRACEFD=19
+PS4=$'+\x1f${EPOCHREALTIME}\x1f${BASH_SOURCE[*]}\x1f${LINENO} ${BASH_LINENO[*]}\x1f'
+set -x
+. "$PROFILE_SCRIPT"
+"""
+
+
+def discover(repo: str, only: Sequence[str]) -> List[str]:
+    inits = sorted(glob.glob(os.path.join(repo, "challenges*", "*", ".init")))
+    if only:
+        inits = [
+            path for path in inits if os.path.basename(os.path.dirname(path)) in only
+        ]
+    return inits
+
+
+def _path_rewriter(mapping: Dict[str, str]):
+    # One pass over the text, longest path first, and only whole path
+    # components: "/flag" must not match "/flags" or "/x/flag".
+    olds = sorted(mapping, key=len, reverse=True)
+    pattern = re.compile(
+        r"(?<![\w./-])(" + "|".join(re.escape(old) for old in olds) + r")(?![\w.-])"
+    )
+    return lambda text: pattern.sub(lambda m: mapping[m.group(1)], text)
+
+
+def rewrite_init(text: str, rewrite) -> str:
+    text = rewrite(text)
+    text = re.sub(r"\bsudo\s+", "", text)
+    # Keep line numbers stable so the report can quote the original lines.
+    return re.sub(r"(?m)^(\s*)su\s.*$", r"\1: skipped interactive su", text)
+
+
+def _prepare_challenge(challenge_dir: str, rewrite) -> None:
+    for dirpath, _dirnames, filenames in os.walk(challenge_dir):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                continue
+            with open(path, "rb") as fp:
+                head = fp.read(2)
+                # Scripts, and the path lists in tools/buildcache.py manifests.
+                if head != b"#!" and not name.endswith(".sha256"):
+                    continue
+                data = head + fp.read()
+            try:
+                text = data.decode()
+            except UnicodeDecodeError:
+                continue
+            text = re.sub(r"\A#!/usr/bin/exec-suid --\s*", "#!", text)
+            with open(path, "w") as fp:
+                fp.write(rewrite(text))
+
+
+def _script_line(sources: List[str], lines: List[int], script: str) -> int:
+    """The line of ``script`` the traced command runs from, or -1.
+
+    Frame ``i`` of the call stack is at ``lines[i]`` in ``sources[i]``; the
+    outermost frame in ``script`` is the .init line that led here, even when
+    the command itself sits in a function body or a sourced file.
+    """
+    for source, lineno in reversed(list(zip(sources, lines))):
+        if source == script:
+            return lineno
+    return -1
+
+
+def parse_trace(
+    trace: str, script: str, finished: float
+) -> List[Tuple[int, str, float]]:
+    """Return (line, command, seconds) per traced command, in order.
+
+    ``line`` is the line of ``script`` it runs from, -1 for commands of
+    the wrapper itself.
+    """
+    events: List[Tuple[float, int, str]] = []
+    for line in trace.splitlines():
+        fields = line.lstrip("+").split(TRACE_SEP, 4)
+        if len(fields) < 5 or not line.startswith("+"):
+            continue
+        try:
+            stamp = float(fields[1])
+            # LINENO, then BASH_LINENO: frame i + 1 was called from line i.
+            lines = [int(n) for n in fields[3].split()]
+        except ValueError:
+            continue
+        lineno = _script_line(fields[2].split(" "), lines, script)
+        if lineno >= 0 or events:
+            events.append((stamp, lineno, fields[4]))
+    steps = []
+    ends = [stamp for stamp, _, _ in events[1:]] + [finished]
+    for (stamp, lineno, command), after in zip(events, ends):
+        if lineno >= 0:
+            steps.append((lineno, command, max(0.0, after - stamp)))
+    return steps
+
+
+def _stop_group(proc: subprocess.Popen) -> None:
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        time.sleep(0.2)
+
+
+def profile(
+    init: str, repo: str, extra_map: Dict[str, str], timeout: float, keep: bool
+) -> Dict[str, Any]:
+    challenge = os.path.relpath(os.path.dirname(init), repo)
+    root = tempfile.mkdtemp(prefix="profile-init-")
+    try:
+        mapping = {path: root + path for path in ISOLATED_PATHS}
+        mapping.update(extra_map)
+        rewrite = _path_rewriter(mapping)
+        shutil.copytree(os.path.dirname(init), os.path.join(root, "challenge"))
+        _prepare_challenge(os.path.join(root, "challenge"), rewrite)
+        os.makedirs(os.path.join(root, "home", "hacker"))
+        os.makedirs(os.path.join(root, "tmp"))
+        with open(os.path.join(root, "flag"), "w") as fp:
+            fp.write(STUB_FLAG)
+
+        with open(init, "r") as fp:
+            original = fp.read().splitlines()
+        script = os.path.join(root, "init.sh")
+        with open(script, "w") as fp:
+            fp.write(rewrite_init("\n".join(original) + "\n", rewrite))
+        trace_path = os.path.join(root, "trace")
+        log_path = os.path.join(root, "output.log")
+
+        env = dict(os.environ, HOME=os.path.join(root, "home", "hacker"))
+        env.setdefault("PYTHONUSERBASE", site.getuserbase())
+        env.update(PROFILE_TRACE=trace_path, PROFILE_SCRIPT=script)
+        timed_out = False
+        started = time.time()
+        with open(log_path, "wb") as log:
+            # Output goes to a file, not a pipe: an .init that backgrounds a
+            # server would otherwise hold the pipe open past its own exit.
+            proc = subprocess.Popen(
+                ["bash", "-c", WRAPPER],
+                cwd=root,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+            try:
+                status: Optional[int] = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                status = None
+            finished = time.time()
+            _stop_group(proc)
+            proc.wait()
+
+        with open(trace_path, "r", errors="replace") as fp:
+            steps = parse_trace(fp.read(), script, finished)
+        with open(log_path, "r", errors="replace") as fp:
+            output = fp.read()
+
+        by_step: Dict[Tuple[int, str], float] = {}
+        for lineno, command, seconds in steps:
+            # Show the isolated paths as the .init wrote them.
+            key = (lineno, command.replace(root, ""))
+            by_step[key] = by_step.get(key, 0.0) + seconds
+        return {
+            "challenge": challenge,
+            "seconds": finished - started,
+            "status": status,
+            "timed_out": timed_out,
+            "steps": [
+                {
+                    "line": lineno,
+                    "command": command,
+                    "source": (
+                        original[lineno - 1].strip()
+                        if 0 < lineno <= len(original)
+                        else ""
+                    ),
+                    "seconds": seconds,
+                }
+                for (lineno, command), seconds in sorted(
+                    by_step.items(), key=lambda item: -item[1]
+                )
+            ],
+            "output_tail": output[-2000:],
+            "root": root if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def _short(text: str, width: int) -> str:
+    return text if len(text) <= width else text[: width - 3] + "..."
+
+
+def report(results: List[Dict[str, Any]], steps: int) -> None:
+    results = sorted(results, key=lambda r: -r["seconds"])
+    print(f"{'rank':>4}  {'challenge':<34} {'wall s':>8}  {'status':<8} slowest step")
+    for rank, result in enumerate(results, 1):
+        if result["timed_out"]:
+            status = "timeout"
+        else:
+            status = f"exit {result['status']}"
+        slowest = result["steps"][0] if result["steps"] else None
+        step = (
+            f"{slowest['seconds']:7.2f}s L{slowest['line']}: "
+            f"{_short(slowest['command'], 60)}"
+            if slowest
+            else "-"
+        )
+        print(
+            f"{rank:>4}  {result['challenge']:<34} {result['seconds']:8.2f}"
+            f"  {status:<8} {step}"
+        )
+
+    for result in results:
+        if len(result["steps"]) < 2 or steps < 2:
+            continue
+        print(f"\n{result['challenge']} ({result['seconds']:.2f}s)")
+        for step in result["steps"][:steps]:
+            print(
+                f"  {step['seconds']:8.3f}s  L{step['line']:<3} "
+                f"{_short(step['command'], 90)}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repo", default=".")
+    parser.add_argument("--only", nargs="*", default=[], help="challenge names")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument(
+        "--map",
+        action="append",
+        default=[],
+        metavar="OLD=NEW",
+        help="also rewrite this absolute path (repeatable)",
+    )
+    parser.add_argument("--steps", type=int, default=5, help="steps shown per init")
+    parser.add_argument("--json", help="also write the full results here")
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the scratch roots for inspection"
+    )
+    args = parser.parse_args()
+
+    extra_map = dict(item.split("=", 1) for item in args.map)
+    inits = discover(args.repo, args.only)
+    if not inits:
+        raise SystemExit("no .init scripts found")
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(
+            pool.map(
+                lambda init: profile(
+                    init, args.repo, extra_map, args.timeout, args.keep
+                ),
+                inits,
+            )
+        )
+
+    report(results, args.steps)
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(results, fp, indent=2)
+            fp.write("\n")
+
+
+if __name__ == "__main__":
+    main()